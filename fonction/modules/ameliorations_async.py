@@ -0,0 +1,36 @@
+import multiprocessing
+import os
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from ..optimisation.simulation import simuler_ameliorations
+
+
+class AmeliorationsWorker(QThread):
+    """
+    Exécute simuler_ameliorations dans un thread séparé, les paquets de modules
+    répartis sur un pool de processus. Les processus sont lancés en « spawn » :
+    un fork depuis l'interface copierait l'état des autres threads (Qt, sauvegarde).
+    `resultats(liste)` est émis à la fin, `erreur(message)` en cas d'échec.
+    """
+
+    resultats = pyqtSignal(list)
+    erreur = pyqtSignal(str)
+
+    def __init__(self, modules, objectif, parent=None, processus=None, **options):
+        super().__init__(parent)
+        self.modules = modules
+        self.objectif = objectif
+        self.processus = processus or os.cpu_count() or 1
+        self.options = options
+
+    def run(self):
+        try:
+            resultats = simuler_ameliorations(
+                self.modules, self.objectif, processus=self.processus,
+                contexte_mp=multiprocessing.get_context("spawn"), **self.options
+            )
+        except Exception as e:
+            self.erreur.emit(f"{type(e).__name__}: {e}")
+            return
+        self.resultats.emit(resultats)
@@ -3,8 +3,22 @@ import json
 import os
 import uuid
 
+from ..versionnage import Versionne
+
 MODULES_FILE = "modules.json"
 
+TYPES_MODULES = ["casque", "transitor", "bracelet", "noyau"]
+
+SUBSTATS = [
+    "Attaque", "Attaque%", "PV", "PV%", "Defense", "Defense%",
+    "Taux crit", "Degats crit", "Resistance", "Precision", "Vitesse"
+]
+
+def en_dicts(modules) -> list:
+    """Modules (objets Module ou dicts) sous forme de dicts."""
+    return [m if isinstance(m, dict) else m.to_dict() for m in modules]
+
+
 class Module:
     def __init__(self, effet, type_, niveau, stat_principale, valeur_principale, sous_stats, id=None):
         self.id = id or self._generate_id()
@@ -42,9 +56,46 @@ class Module:
         )
 
 class ModuleManager:
-    def __init__(self, filepath=MODULES_FILE):
+    """
+    Inventaire des modules, publié par versions immuables (voir Versionne) :
+    `modules` est un tuple remplacé à chaque modification, jamais modifié en place.
+    """
+
+    def __init__(self, filepath=MODULES_FILE, sauvegarde=None):
         self.filepath = filepath
-        self.modules = self.load()
+        self.depot = Versionne(self.load())
+        self.reindexer()
+        # Avec un service SauvegardeAuto, save() ne fait que marquer l'inventaire comme modifié
+        self.sauvegarde = sauvegarde
+        if sauvegarde is not None:
+            sauvegarde.enregistrer("modules", filepath, self.instantane, preparer=self.serialiser)
+
+    @property
+    def modules(self) -> tuple:
+        return self.depot.elements
+
+    @property
+    def version(self) -> int:
+        return self.depot.version
+
+    def instantane(self) -> tuple:
+        """Version courante de l'inventaire : lecture cohérente depuis un autre thread, sans copie."""
+        return self.depot.elements
+
+    @staticmethod
+    def serialiser(modules):
+        return [m.to_dict() for m in modules]
+
+    def reindexer(self):
+        self.index_ids = {m.id: i for i, m in enumerate(self.modules)}
+
+    def position(self, module_id):
+        """Index courant du module d'id donné (None s'il n'existe plus)."""
+        return self.index_ids.get(module_id)
+
+    def get(self, module_id):
+        i = self.index_ids.get(module_id)
+        return None if i is None else self.modules[i]
 
     def load(self):
         if not os.path.exists(self.filepath):
@@ -54,18 +105,41 @@ class ModuleManager:
             return [Module.from_dict(m) for m in data]
 
     def save(self):
+        if self.sauvegarde is not None:
+            self.sauvegarde.marquer("modules")
+            return
         with open(self.filepath, "w", encoding="utf-8") as f:
-            json.dump([m.to_dict() for m in self.modules], f, indent=2, ensure_ascii=False)
+            json.dump(self.serialiser(self.modules), f, indent=2, ensure_ascii=False)
 
-    def add_module(self, module):
-        self.modules.append(module)
+    def _publier(self, modules):
+        self.depot.publier(modules)
+        self.reindexer()
         self.save()
 
+    def add_module(self, module):
+        self._publier(self.modules + (module,))
+
+    def add_modules(self, modules):
+        """Ajout groupé : une seule écriture du fichier, quel que soit le nombre de modules."""
+        self._publier(self.modules + tuple(modules))
+
     def update_module(self, index, new_module):
-        self.modules[index] = new_module
-        self.save()
+        self.update_modules({index: new_module})
 
     def delete_module(self, index):
         if 0 <= index < len(self.modules):
-            del self.modules[index]
+            self.delete_modules([index])
+
+    def update_modules(self, remplacements):
+        """Modification groupée {index: module} : une seule version publiée, une seule écriture."""
+        self.depot.remplacer(remplacements)
+        self.reindexer()
+        self.save()
+
+    def delete_modules(self, indices):
+        """Suppression groupée en une passe et une seule écriture."""
+        retires = {i for i in indices if 0 <= i < len(self.modules)}
+        if retires:
+            self.depot.retirer(retires)
+            self.reindexer()
             self.save()
@@ -0,0 +1,154 @@
+import csv
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from .gestion_modules import Module, SUBSTATS, TYPES_MODULES
+from ..optimisation.projection import cle_stat
+
+NIVEAU_MIN, NIVEAU_MAX = 1, 15
+
+# Nom canonique d'une stat (principale ou sous-stat) : "attaque %", "Défense" -> "Attaque%", "Defense"
+_STATS_CANON = {cle_stat(s): s for s in SUBSTATS}
+
+
+def lire_export(path):
+    """
+    Lit un export JSON (liste de modules, ou {"modules": [...]}) ou CSV.
+    En CSV, les sous-stats tiennent dans une colonne `sous_stats` au format
+    "Attaque%=5;Vitesse=3".
+    """
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if ext == ".csv":
+            lignes = []
+            for row in csv.DictReader(f):
+                subs = []
+                for part in (row.get("sous_stats") or "").split(";"):
+                    if part.strip():
+                        stat, _, valeur = part.partition("=")
+                        subs.append({"stat": stat.strip(), "valeur": valeur.strip()})
+                lignes.append({**row, "sous_stats": subs})
+            return lignes
+        data = json.load(f)
+    data = data.get("modules", []) if isinstance(data, dict) else data
+    if not isinstance(data, list):
+        raise ValueError("l'export JSON doit contenir une liste de modules")
+    return data
+
+
+def _nombre(x):
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def empreinte(module: dict) -> str:
+    """Hash du contenu (sans l'id) : deux modules identiques ont la même empreinte."""
+    contenu = [
+        str(module["effet"]), str(module["type"]), int(module["niveau"]),
+        str(module["stat_principale"]), float(module["valeur_principale"]),
+        sorted((str(s["stat"]), float(s["valeur"])) for s in module["sous_stats"]),
+    ]
+    return hashlib.sha1(json.dumps(contenu, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def valider(records):
+    """
+    Valide et normalise tous les enregistrements en une passe par colonne.
+    Retourne (modules normalisés, [(numéro de ligne, raison, brut)]).
+    """
+    n = len(records)
+    if n == 0:
+        return [], []
+    # Lignes mal formées : rejetées avec leur raison, lues comme vides pour les colonnes
+    objets = np.array([isinstance(r, dict) for r in records])
+    dicts = [r if isinstance(r, dict) else {} for r in records]
+    listes_subs = np.array([isinstance(d.get("sous_stats") or [], list)
+                            and all(isinstance(s, dict) for s in d.get("sous_stats") or [])
+                            for d in dicts])
+    subs = [d.get("sous_stats") or [] if ok else [] for d, ok in zip(dicts, listes_subs)]
+
+    effets = np.array([str(r.get("effet") or "").strip() for r in dicts], dtype=object)
+    types = np.array([str(r.get("type") or "").strip().lower() for r in dicts], dtype=object)
+    niveaux = np.array([_nombre(r.get("niveau")) for r in dicts])
+    principales = np.array([_STATS_CANON.get(cle_stat(r.get("stat_principale"))) for r in dicts], dtype=object)
+    valeurs = np.array([_nombre(r.get("valeur_principale")) for r in dicts])
+
+    raisons = np.full(n, "", dtype=object)
+
+    def rejeter(masque, raison):
+        raisons[masque & (raisons == "")] = raison
+
+    rejeter(~objets, "ligne qui n'est pas un module")
+    rejeter(~listes_subs, "sous-stats mal formées (liste attendue)")
+    rejeter(effets == "", "effet manquant")
+    rejeter(~np.isin(types, TYPES_MODULES), "type inconnu")
+    rejeter(np.isnan(niveaux) | (niveaux != np.round(niveaux))
+            | (niveaux < NIVEAU_MIN) | (niveaux > NIVEAU_MAX), "niveau invalide")
+    rejeter(np.equal(principales, None), "stat principale manquante ou inconnue")
+    rejeter(np.isnan(valeurs) | (valeurs < 0), "valeur principale manquante ou invalide")
+
+    # Sous-stats aplaties : une ligne par sous-stat, rattachée à son module
+    proprietaires, noms, vals = [], [], []
+    for i, liste in enumerate(subs):
+        for sub in liste:
+            proprietaires.append(i)
+            noms.append(cle_stat(sub.get("stat", "")))
+            vals.append(_nombre(sub.get("valeur")))
+    proprietaires = np.array(proprietaires, dtype=np.intp)
+    vals = np.array(vals, dtype=float)
+    canon = np.array([_STATS_CANON.get(nm) for nm in noms], dtype=object)
+    invalides = np.zeros(n, dtype=bool)
+    if len(proprietaires):
+        mauvaises = np.equal(canon, None) | np.isnan(vals) | (vals < 0)
+        invalides[proprietaires[mauvaises]] = True
+    rejeter(invalides, "sous-stat inconnue ou invalide")
+
+    modules, rejets = [], []
+    debut_subs = np.searchsorted(proprietaires, np.arange(n + 1))
+    for i in range(n):
+        if raisons[i]:
+            rejets.append((i + 1, raisons[i], records[i]))
+            continue
+        a, b = debut_subs[i], debut_subs[i + 1]
+        modules.append({
+            "id": dicts[i].get("id") or None,
+            "effet": effets[i],
+            "type": types[i],
+            "niveau": int(niveaux[i]),
+            "stat_principale": principales[i],
+            "valeur_principale": float(valeurs[i]),
+            "sous_stats": [{"stat": canon[j], "valeur": float(vals[j])} for j in range(a, b)],
+        })
+    return modules, rejets
+
+
+def importer_modules(manager, path):
+    """
+    Import groupé : lecture, validation, déduplication par contenu (fichier et
+    inventaire existant) puis un seul ajout/écriture via le ModuleManager.
+
+    Retourne {"importes": [Module], "doublons": int, "rejets": [(ligne, raison, brut)]}.
+    """
+    modules, rejets = valider(lire_export(path))
+    connues = {empreinte(m.to_dict()) for m in manager.modules}
+    ids_connus = {m.id for m in manager.modules}
+    nouveaux, doublons = [], 0
+    for d in modules:
+        h = empreinte(d)
+        if h in connues:
+            doublons += 1
+            continue
+        connues.add(h)
+        if d["id"] in ids_connus:
+            d["id"] = None  # id déjà pris par un autre module : on en génère un
+        module = Module.from_dict(d)
+        ids_connus.add(module.id)
+        nouveaux.append(module)
+    if nouveaux:
+        manager.add_modules(nouveaux)
+    return {"importes": nouveaux, "doublons": doublons, "rejets": rejets}
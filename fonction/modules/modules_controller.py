@@ -1,28 +1,55 @@
 import os
+import json
+
+import numpy as np
 from PyQt5.QtWidgets import (
     QListWidgetItem, QMenu, QMessageBox, QLineEdit,
     QWidget, QHBoxLayout, QVBoxLayout, QCompleter,
-    QDoubleSpinBox, QSpinBox
+    QDoubleSpinBox, QSpinBox, QInputDialog,
+    QPushButton, QFileDialog, QAbstractItemView, QComboBox
 )
 from PyQt5.QtGui import QIcon
 from PyQt5.QtCore import Qt
-from .gestion_modules import ModuleManager, Module
+from .gestion_modules import ModuleManager, Module, SUBSTATS, TYPES_MODULES
 from .stats_par_type_handler import StatsParTypeHandler
-
-SUBSTATS = [
-    "Attaque", "Attaque%", "PV", "PV%", "Defense", "Defense%",
-    "Taux crit", "Degats crit", "Resistance", "Precision", "Vitesse"
-]
+from .import_modules import importer_modules
+from .ameliorations_async import AmeliorationsWorker
+from .score_modules import IndexScores, calculer_scores, charger_config_score
+from ..optimisation.projection import TableProjection, cle_stat, projeter_modules, NIVEAU_MAX
+from ..optimisation.equipe import objectif_personnage
+from ..optimisation.scores import METRIQUES, objectif_metrique
+from ..optimisation.stats import STATS, totaux_personnage, vecteurs_personnage
 
 class ModulesController:
-    def __init__(self, ui, modules_path):
+    def __init__(self, ui, modules_path, sauvegarde=None, references=None):
         self.ui = ui
-        self.manager = ModuleManager(modules_path)
+        self.modules_path = modules_path
+        self.manager = ModuleManager(modules_path, sauvegarde)
+        # references() : [(personnage, totaux)] en mémoire (PersonnagesController.references)
+        self.references = references
+        self.simulation = None
+        # Abonnés notifiés après chaque modification :
+        # callback(modules=[dicts], supprimes=[ids], desequipes=[ids])
+        self.abonnes_modifications = []
 
         # Charger les stats principales par type/niveau
         stats_file = os.path.join(os.getcwd(), 'data', 'stats_par_type.json')
         self.stats_handler = StatsParTypeHandler(stats_file)
 
+        # Projection des stats principales au niveau cible (colonne « N15 »)
+        self.niveau_projection = NIVEAU_MAX
+        self.table_projection = TableProjection(self.stats_handler.data)
+        self.projections = projeter_modules([], None, table=self.table_projection)
+
+        # Score d'équipement : calculé au chargement puis à chaque modification, indexé par type
+        self.config_score = charger_config_score(os.path.join(os.getcwd(), 'data', 'score_modules.json'))
+        self.index_scores = IndexScores()
+        modules = self.manager.modules
+        self.index_scores.reconstruire(
+            [m.id for m in modules], [m.type for m in modules],
+            calculer_scores(modules, self.config_score, self.table_projection)
+        )
+
         if self.ui.substatsContainer.layout() is None:
             self.ui.substatsContainer.setLayout(QVBoxLayout())
 
@@ -43,7 +70,9 @@ class ModulesController:
         self.ui.lineEditStatPrincipale.setCompleter(stat_completer)
 
         self.ui.searchModuleBar.textChanged.connect(self.update_list)
+        self._init_filtres_score()
         self.ui.moduleList.itemClicked.connect(self.on_module_selected)
+        self.ui.moduleList.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.ui.moduleList.setContextMenuPolicy(Qt.CustomContextMenu)
         self.ui.moduleList.customContextMenuRequested.connect(self.open_context_menu)
 
@@ -53,9 +82,43 @@ class ModulesController:
         self.ui.buttonAddSubstat.clicked.connect(lambda: self._add_substat_row())
         self.ui.buttonSaveModule.clicked.connect(lambda: self.save_module())
 
+        self.buttonImport = QPushButton("Importer…", self.ui)
+        self.ui.layoutActionsModule.insertWidget(1, self.buttonImport)
+        self.buttonImport.clicked.connect(self.import_modules)
+
         self.update_list()
         self.update_main_stat()
 
+    def _init_filtres_score(self):
+        """Filtre par type, score minimal et tri par score, sous la barre de recherche."""
+        layout = QHBoxLayout()
+        self.comboTypeFiltre = QComboBox(self.ui)
+        self.comboTypeFiltre.addItem("Tous types", None)
+        for t in TYPES_MODULES:
+            self.comboTypeFiltre.addItem(t.capitalize(), t)
+        self.spinScoreMin = QDoubleSpinBox(self.ui)
+        self.spinScoreMin.setRange(0.0, 1000.0)
+        self.spinScoreMin.setDecimals(1)
+        self.spinScoreMin.setPrefix("Score ≥ ")
+        self.comboTriModules = QComboBox(self.ui)
+        self.comboTriModules.addItems(["Ordre d'ajout", "Score décroissant", "Score croissant"])
+        for w in (self.comboTypeFiltre, self.spinScoreMin, self.comboTriModules):
+            layout.addWidget(w)
+        self.ui.verticalLayoutModulesList.insertLayout(1, layout)
+        self.comboTypeFiltre.currentIndexChanged.connect(self.update_list)
+        self.spinScoreMin.valueChanged.connect(self.update_list)
+        self.comboTriModules.currentIndexChanged.connect(self.update_list)
+
+    def _maj_scores(self, modules=(), supprimes=()):
+        """Recalcule le score des seuls modules ajoutés/modifiés et les replace dans l'index."""
+        if supprimes:
+            self.index_scores.supprimer(supprimes)
+        if modules:
+            self.index_scores.mettre_a_jour(
+                [m.id for m in modules], [m.type for m in modules],
+                calculer_scores(modules, self.config_score, self.table_projection)
+            )
+
     def update_main_stat(self):
         type_module = self.ui.comboTypeModule.currentText().lower()
         niveau = self.ui.spinBoxNiveauModule.value()
@@ -82,27 +145,104 @@ class ModulesController:
         self.ui.lineEditNomModule.setText(effet)
         self.ui.searchModuleBar.setText(effet)
 
+    def update_projections(self):
+        """Recalcule en une passe la stat principale projetée de tout l'inventaire."""
+        self.projections = projeter_modules(
+            self.manager.modules, None, self.niveau_projection, table=self.table_projection
+        )
+
+    def _ordre_affichage(self):
+        """Positions à afficher : ordre d'ajout, ou requête triée sur l'index des scores."""
+        modules = self.manager.modules
+        type_filtre = self.comboTypeFiltre.currentData()
+        minimum = self.spinScoreMin.value() or None
+        tri = self.comboTriModules.currentIndex()
+        if tri == 0 and type_filtre is None and minimum is None:
+            return range(len(modules))
+        positions = {m.id: i for i, m in enumerate(modules)}
+        ids = self.index_scores.plage(type_filtre, minimum)
+        if tri == 0:
+            return sorted(positions[mid] for mid in ids)
+        if tri == 2:
+            ids = ids[::-1]
+        return [positions[mid] for mid in ids]
+
+    def _visible(self, m):
+        """Le module passe-t-il le filtre de type, le score minimum et la recherche ?"""
+        type_filtre = self.comboTypeFiltre.currentData()
+        minimum = self.spinScoreMin.value() or None
+        search = self.ui.searchModuleBar.text().strip().lower()
+        return ((type_filtre is None or m.type.lower() == type_filtre)
+                and (minimum is None or self.index_scores.get(m.id, 0) >= minimum)
+                and (search in m.effet.lower() or search in m.type.lower()))
+
+    def _cle_affichage(self, module_id):
+        """Clé de l'ordre d'affichage courant (mêmes règles que _ordre_affichage)."""
+        if self.comboTriModules.currentIndex() == 0:
+            return self.manager.position(module_id)
+        return (self.index_scores.get(module_id, 0), module_id)
+
+    def _replacer_items(self, items):
+        """
+        Après modification de quelques modules : les items sont tous retirés (la liste
+        restante reste triée), puis ceux qui passent encore les filtres sont réinsérés
+        à leur place par recherche dichotomique.
+        """
+        liste = self.ui.moduleList
+        decroissant = self.comboTriModules.currentIndex() == 1
+        for it in items:
+            liste.takeItem(liste.row(it))
+        for it in items:
+            idx = self.manager.position(it.data(Qt.UserRole))
+            if idx is None or not self._visible(self.manager.modules[idx]):
+                continue
+            self._remplir_item(it, idx)
+            cle = self._cle_affichage(it.data(Qt.UserRole))
+            bas, haut = 0, liste.count()
+            while bas < haut:
+                milieu = (bas + haut) // 2
+                autre = self._cle_affichage(liste.item(milieu).data(Qt.UserRole))
+                if (autre > cle) if decroissant else (autre < cle):
+                    bas = milieu + 1
+                else:
+                    haut = milieu
+            liste.insertItem(bas, it)
+
     def update_list(self):
         search = self.ui.searchModuleBar.text().strip().lower()
         self.ui.moduleList.clear()
-        for idx, m in enumerate(self.manager.modules):
+        if len(self.projections) != len(self.manager.modules):
+            self.update_projections()
+        for idx in self._ordre_affichage():
+            m = self.manager.modules[idx]
             if search in m.effet.lower() or search in m.type.lower():
-                label = f"{m.effet} [{m.type} N{m.niveau}]"
-                item = QListWidgetItem(label)
-                icon_path = os.path.join("images", f"{m.effet}.png")
-                if os.path.exists(icon_path):
-                    item.setIcon(QIcon(icon_path))
-                if m.sous_stats:
-                    tooltip = "Sous-stats:\n" + "\n".join(
-                        f"{ss['stat']}: {ss['valeur']}" for ss in m.sous_stats
-                    )
-                    item.setToolTip(tooltip)
-                item.setData(Qt.UserRole, idx)
+                item = QListWidgetItem()
+                self._remplir_item(item, idx)
                 self.ui.moduleList.addItem(item)
 
+    def _remplir_item(self, item, idx):
+        m = self.manager.modules[idx]
+        label = f"[{self.index_scores.get(m.id, 0):.1f}] {m.effet} [{m.type} N{m.niveau}]"
+        projetee = self.projections[idx]
+        if m.niveau < self.niveau_projection and projetee != m.valeur_principale:
+            label += f" → N{self.niveau_projection} : {m.stat_principale} {projetee:g}"
+        item.setText(label)
+        icon_path = os.path.join("images", f"{m.effet}.png")
+        if os.path.exists(icon_path):
+            item.setIcon(QIcon(icon_path))
+        tooltip = ""
+        if m.sous_stats:
+            tooltip = "Sous-stats:\n" + "\n".join(
+                f"{ss['stat']}: {ss['valeur']}" for ss in m.sous_stats
+            )
+        item.setToolTip(tooltip)
+        # id stable : reste valable quand l'inventaire publie une nouvelle version
+        item.setData(Qt.UserRole, m.id)
+
     def on_module_selected(self, item):
-        idx = item.data(Qt.UserRole)
-        module = self.manager.modules[idx]
+        module = self.manager.get(item.data(Qt.UserRole))
+        if module is None:
+            return
 
         self.ui.lineEditNomModule.setText(module.effet)
         self.ui.comboTypeModule.setCurrentText(module.type)
@@ -167,29 +307,225 @@ class ModulesController:
                 sous_stats=self._read_substats()
             )
             current = self.ui.moduleList.currentItem()
-            if current:
-                idx = current.data(Qt.UserRole)
+            idx = self.manager.position(current.data(Qt.UserRole)) if current else None
+            if idx is not None:
+                # garder l'id : les personnages qui l'équipent le référencent
+                module.id = current.data(Qt.UserRole)
                 self.manager.update_module(idx, module)
             else:
                 self.manager.add_module(module)
+            self._maj_scores([module])
+            self.update_projections()
             self.update_list()
+            self._notifier(modules=[module.to_dict()])
         except Exception as e:
             QMessageBox.critical(self.ui, "Erreur inattendue", f"{type(e).__name__}: {e}")
 
+    def import_modules(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self.ui, "Importer des modules", "", "Exports (*.json *.csv)"
+        )
+        if not path:
+            return
+        try:
+            rapport = importer_modules(self.manager, path)
+        except Exception as e:
+            QMessageBox.critical(self.ui, "Erreur d'import", f"{type(e).__name__}: {e}")
+            return
+        self._maj_scores(rapport["importes"])
+        self.update_projections()
+        self.update_list()
+        self._notifier(modules=[m.to_dict() for m in rapport["importes"]])
+
+        box = QMessageBox(QMessageBox.Information, "Import",
+                          f"{len(rapport['importes'])} module(s) importé(s), "
+                          f"{rapport['doublons']} doublon(s) ignoré(s), "
+                          f"{len(rapport['rejets'])} ligne(s) rejetée(s).",
+                          QMessageBox.Ok, self.ui)
+        if rapport["rejets"]:
+            box.setDetailedText("\n".join(
+                f"Ligne {ligne} : {raison} — {brut}" for ligne, raison, brut in rapport["rejets"]
+            ))
+        box.exec_()
+
     def open_context_menu(self, pos):
         item = self.ui.moduleList.itemAt(pos)
         if not item:
             return
+        selection = self.ui.moduleList.selectedItems()
+        if item not in selection:
+            selection = [item]
+        n = len(selection)
         menu = QMenu()
-        delete_action = menu.addAction("Supprimer ce module")
+        delete_action = menu.addAction("Supprimer ce module" if n == 1 else f"Supprimer les {n} modules")
+        type_action = menu.addAction("Changer le type…")
+        level_action = menu.addAction("Changer le niveau…")
+        unequip_action = menu.addAction("Déséquiper partout")
+        menu.addSeparator()
+        rank_action = menu.addAction("Classer les améliorations jusqu'au N15…")
         action = menu.exec_(self.ui.moduleList.viewport().mapToGlobal(pos))
-        if action == delete_action:
-            idx = item.data(Qt.UserRole)
+        if action == rank_action:
+            self.classer_ameliorations()
+        elif action == delete_action:
+            texte = f"le module « {item.text()} »" if n == 1 else f"les {n} modules sélectionnés"
             resp = QMessageBox.question(
                 self.ui, "Suppression",
-                f"Supprimer le module « {item.text()} » ?",
+                f"Supprimer {texte} ?",
                 QMessageBox.Yes | QMessageBox.No
             )
             if resp == QMessageBox.Yes:
-                self.manager.delete_module(idx)
-                self.update_list()
+                self.delete_selection(selection)
+        elif action == type_action:
+            type_, ok = QInputDialog.getItem(self.ui, "Type", "Nouveau type :", TYPES_MODULES, 0, False)
+            if ok:
+                self.edit_selection(selection, type_=type_)
+        elif action == level_action:
+            niveau, ok = QInputDialog.getInt(self.ui, "Niveau", "Nouveau niveau :", 15, 1, 15)
+            if ok:
+                self.edit_selection(selection, niveau=niveau)
+        elif action == unequip_action:
+            self._notifier(desequipes=[it.data(Qt.UserRole) for it in selection])
+
+    def delete_selection(self, items):
+        """Suppression groupée : une écriture, puis retrait des seuls éléments concernés de la liste."""
+        ids = [it.data(Qt.UserRole) for it in items]
+        indices = sorted(i for i in map(self.manager.position, ids) if i is not None)
+        self.manager.delete_modules(indices)
+        self._maj_scores(supprimes=ids)
+        self.projections = np.delete(self.projections, indices)
+        # les éléments portent des ids : rien à renuméroter dans la liste
+        retires = set(ids)
+        liste = self.ui.moduleList
+        for row in reversed(range(liste.count())):
+            if liste.item(row).data(Qt.UserRole) in retires:
+                liste.takeItem(row)
+        self._notifier(supprimes=ids)
+
+    def edit_selection(self, items, type_=None, niveau=None):
+        """Changement groupé de type et/ou de niveau : une écriture, seuls les items modifiés sont replacés."""
+        remplacements = {}
+        for it in items:
+            idx = self.manager.position(it.data(Qt.UserRole))
+            if idx is None:
+                continue
+            d = self.manager.modules[idx].to_dict()
+            if type_ is not None:
+                d["type"] = type_
+            if niveau is not None:
+                d["niveau"] = niveau
+                suggestion = self.stats_handler.get_stat_par_type(d["type"], niveau)
+                if suggestion and cle_stat(suggestion["stat"]) == cle_stat(d["stat_principale"]):
+                    d["valeur_principale"] = suggestion["valeur"]
+            remplacements[idx] = Module.from_dict(d)
+        self.manager.update_modules(remplacements)
+        self._maj_scores(list(remplacements.values()))
+        self.update_projections()
+        self._replacer_items(items)
+        self._notifier(modules=[m.to_dict() for m in remplacements.values()])
+
+    def _notifier(self, modules=(), supprimes=(), desequipes=()):
+        for callback in self.abonnes_modifications:
+            callback(modules=list(modules), supprimes=list(supprimes), desequipes=list(desequipes))
+
+    def _references(self):
+        """
+        [(personnage, totaux)] du roster en mémoire (PersonnagesController.references) ;
+        à défaut personnages.json voisin de modules.json, après les écritures en attente.
+        """
+        if self.references is not None:
+            return self.references()
+        if self.manager.sauvegarde is not None:
+            self.manager.sauvegarde.vider()
+        path = os.path.join(os.path.dirname(self.modules_path), "personnages.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                personnages = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            personnages = []
+        return [
+            (p, totaux_personnage(p, [self.manager.get(mid).to_dict() for mid in p.get("modules", [])
+                                      if self.manager.get(mid) is not None]))
+            for p in personnages
+        ]
+
+    def _choisir_reference(self):
+        """
+        Personnage de référence (ou moyenne du roster) : ses totaux servent de point de
+        départ aux gains, sa base d'assiette aux sous-stats en %. None si annulé.
+        """
+        references = self._references()
+        choix = ["Moyenne du roster", *(p["nom"] for p, _ in references)]
+        nom, ok = QInputDialog.getItem(self.ui, "Amélioration", "Personnage de référence :", choix, 0, False)
+        if not ok:
+            return None
+        if nom == choix[0]:
+            if not references:
+                return None, np.zeros(len(STATS)), np.zeros(len(STATS))
+            base = sum(vecteurs_personnage(p)[1] for p, _ in references) / len(references)
+            totaux = np.mean([[t[k] for k in STATS] for _, t in references], axis=0)
+            return None, base, totaux
+        perso, totaux = references[choix.index(nom) - 1]
+        return perso, vecteurs_personnage(perso)[1], np.array([totaux[k] for k in STATS], dtype=float)
+
+    def _choisir_objectif(self, perso):
+        """(libellé, objectif) : objectif de la fiche, métrique ou stat ; None si annulé."""
+        choix = [*METRIQUES, *STATS]
+        fiche = perso.get("objectif") if perso else None
+        if fiche:
+            choix.insert(0, f"Objectif de {perso['nom']} ({fiche if isinstance(fiche, str) else 'pondéré'})")
+        nom, ok = QInputDialog.getItem(self.ui, "Amélioration", "Objectif à maximiser :", choix, 0, False)
+        if not ok:
+            return None
+        try:
+            objectif = objectif_personnage(perso) if fiche and nom == choix[0] else objectif_metrique(nom)
+        except ValueError as e:
+            QMessageBox.warning(self.ui, "Erreur", str(e))
+            return None
+        return nom, objectif
+
+    def classer_ameliorations(self):
+        """
+        Monte Carlo des jets restants de chaque module, classé par gain espéré sur
+        l'objectif, à partir des totaux d'un personnage de référence (ou de la moyenne).
+        Calculé en arrière-plan (AmeliorationsWorker) sur la version courante de l'inventaire.
+        """
+        if self.simulation is not None and self.simulation.isRunning():
+            QMessageBox.information(self.ui, "Amélioration", "Un classement est déjà en cours.")
+            return
+        reference = self._choisir_reference()
+        if reference is None:
+            return
+        perso, base, totaux = reference
+        choix = self._choisir_objectif(perso)
+        if choix is None:
+            return
+        libelle, objectif = choix
+        modules = self.manager.modules
+        self.simulation = AmeliorationsWorker(
+            modules, objectif, parent=self.ui, base=base, reference=totaux,
+            n_tirages=1000, stats_par_type=self.stats_handler.data
+        )
+        self.simulation.resultats.connect(lambda resultats: self._afficher_ameliorations(libelle, modules, resultats))
+        self.simulation.erreur.connect(lambda msg: QMessageBox.warning(self.ui, "Erreur", msg))
+        self.simulation.start()
+
+    def attendre_simulation(self):
+        """À la fermeture : ne pas détruire le thread pendant un classement."""
+        if self.simulation is not None:
+            self.simulation.wait()
+
+    def _afficher_ameliorations(self, stat, modules, resultats):
+        classes = sorted(
+            (r for r in zip(modules, resultats) if r[1]["jets"] or r[0].niveau < NIVEAU_MAX),
+            key=lambda r: -r[1]["esperance"]
+        )
+        lignes = [
+            f"{m.effet} [{m.type} N{m.niveau}] : +{r['esperance']:.1f} "
+            f"(P10 {r['quantiles'][0.1]:.0f} / P90 {r['quantiles'][0.9]:.0f})"
+            for m, r in classes[:50]
+        ]
+        box = QMessageBox(QMessageBox.Information, "Amélioration",
+                          f"Meilleurs candidats pour « {stat} » (gain espéré au N{NIVEAU_MAX}) :\n\n"
+                          + "\n".join(lignes[:10]), QMessageBox.Ok, self.ui)
+        box.setDetailedText("\n".join(lignes))
+        box.exec_()
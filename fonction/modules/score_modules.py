@@ -0,0 +1,152 @@
+import json
+import os
+from bisect import bisect_left, bisect_right, insort
+
+import numpy as np
+
+from .gestion_modules import SUBSTATS, en_dicts
+from ..optimisation.projection import NIVEAU_MAX, TableProjection
+
+# Valeur d'une sous-stat « pleine » : une sous-stat vaut poids × valeur / référence
+REFERENCES_SOUS_STATS = {
+    "Attaque": 50, "Attaque%": 10, "PV": 500, "PV%": 10, "Defense": 50, "Defense%": 10,
+    "Taux crit": 8, "Degats crit": 12, "Resistance": 10, "Precision": 10, "Vitesse": 6,
+}
+
+CONFIG_SCORE_DEFAUT = {
+    "poids": {s: 1.0 for s in SUBSTATS},
+    "references": REFERENCES_SOUS_STATS,
+    # stat principale : poids × (valeur actuelle / valeur projetée au N15) ;
+    # sans valeur N15 connue pour le couple type/stat : poids × (niveau / 15)
+    "poids_principale": 2.0,
+}
+
+_CANON = {s.replace(" ", "").lower(): s for s in SUBSTATS}
+
+
+def charger_config_score(path):
+    """Config du score (data/score_modules.json) fusionnée avec les valeurs par défaut."""
+    config = {cle: dict(v) if isinstance(v, dict) else v for cle, v in CONFIG_SCORE_DEFAUT.items()}
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            perso = json.load(f)
+        for cle, valeur in perso.items():
+            if isinstance(valeur, dict):
+                config[cle] = {**config.get(cle, {}), **valeur}
+            else:
+                config[cle] = valeur
+    return config
+
+
+def calculer_scores(modules, config=None, table=None) -> np.ndarray:
+    """
+    Score d'équipement de chaque module : somme pondérée des sous-stats normalisées
+    plus la stat principale rapportée à sa valeur au N15 (projection en une passe).
+    Si stats_par_type.json ne donne pas la valeur N15 du couple type/stat, la
+    stat principale est rapportée au niveau du module : un N1 ne vaut pas un N15.
+    """
+    config = config or CONFIG_SCORE_DEFAUT
+    poids, references = config["poids"], config["references"]
+    facteurs = {cle: poids.get(s, 0) / references[s] for cle, s in _CANON.items() if references.get(s)}
+
+    modules = list(modules)
+    scores = np.zeros(len(modules))
+    if not modules:
+        return scores
+    table = table or TableProjection(None)
+    dicts = en_dicts(modules)
+    lignes = table.index_lignes([d.get("type", "") for d in dicts], [d.get("stat_principale", "") for d in dicts])
+    niveaux = np.array([d.get("niveau", 0) or 0 for d in dicts], dtype=np.intp)
+    valeurs = np.array([d.get("valeur_principale", 0) or 0 for d in dicts], dtype=float)
+    projetees = table.projeter(lignes, niveaux, valeurs, NIVEAU_MAX)
+    if len(table.valeurs):
+        connues = (lignes >= 0) & ~np.isnan(table.valeurs[np.where(lignes >= 0, lignes, 0), NIVEAU_MAX])
+    else:
+        connues = np.zeros(len(dicts), dtype=bool)
+    for i, d in enumerate(dicts):
+        scores[i] = sum(
+            facteurs.get(str(sub.get("stat", "")).replace(" ", "").lower(), 0) * float(sub.get("valeur", 0))
+            for sub in d.get("sous_stats", [])
+        )
+        principale = _CANON.get(str(d.get("stat_principale", "")).replace(" ", "").lower())
+        if connues[i]:
+            if projetees[i] <= 0:
+                continue
+            ratio = valeurs[i] / projetees[i]
+        else:
+            ratio = min(max(niveaux[i], 0), NIVEAU_MAX) / NIVEAU_MAX
+        scores[i] += config["poids_principale"] * poids.get(principale, 1.0) * ratio
+    return scores
+
+
+class IndexScores:
+    """
+    Scores par module et, pour chaque type, liste triée (score, id) : top-N et
+    requêtes par plage de score par recherche dichotomique, mises à jour module
+    par module à chaque modification.
+    """
+
+    def __init__(self):
+        self.scores = {}
+        self.par_type = {}
+
+    def reconstruire(self, ids, types, scores):
+        self.scores = {}
+        self.par_type = {}
+        for mid, type_module, score in zip(ids, types, scores):
+            self.scores[mid] = (str(type_module).lower(), float(score))
+        for mid, (type_module, score) in self.scores.items():
+            self.par_type.setdefault(type_module, []).append((score, mid))
+        for liste in self.par_type.values():
+            liste.sort()
+
+    def __getitem__(self, module_id):
+        return self.scores[module_id][1]
+
+    def get(self, module_id, defaut=None):
+        entree = self.scores.get(module_id)
+        return defaut if entree is None else entree[1]
+
+    def _retirer(self, module_id):
+        entree = self.scores.pop(module_id, None)
+        if entree is None:
+            return
+        type_module, score = entree
+        liste = self.par_type[type_module]
+        i = bisect_left(liste, (score, module_id))
+        if i < len(liste) and liste[i] == (score, module_id):
+            del liste[i]
+
+    def mettre_a_jour(self, ids, types, scores):
+        for mid, type_module, score in zip(ids, types, scores):
+            self._retirer(mid)
+            entree = (str(type_module).lower(), float(score))
+            self.scores[mid] = entree
+            insort(self.par_type.setdefault(entree[0], []), (entree[1], mid))
+
+    def supprimer(self, module_ids):
+        for mid in module_ids:
+            self._retirer(mid)
+
+    def _listes(self, type_module):
+        if type_module:
+            return [self.par_type.get(type_module.lower(), [])]
+        return list(self.par_type.values())
+
+    def plage(self, type_module=None, minimum=None, maximum=None) -> list:
+        """Ids des modules (du type donné, ou de tous) dont le score est dans [minimum, maximum], meilleur d'abord."""
+        resultat = []
+        for liste in self._listes(type_module):
+            debut = 0 if minimum is None else bisect_left(liste, (minimum,))
+            fin = len(liste) if maximum is None else bisect_right(liste, (maximum, chr(0x10FFFF)))
+            resultat.extend(liste[debut:fin])
+        resultat.sort(reverse=True)
+        return [mid for _, mid in resultat]
+
+    def top(self, type_module=None, n=10) -> list:
+        """Les n meilleurs modules (du type donné, ou de tous)."""
+        meilleurs = []
+        for liste in self._listes(type_module):
+            meilleurs.extend(liste[-n:])
+        meilleurs.sort(reverse=True)
+        return [mid for _, mid in meilleurs[:n]]
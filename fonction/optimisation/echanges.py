@@ -0,0 +1,70 @@
+import numpy as np
+
+from .recherche_build import ObjectifPondere
+from .stats import STATS, TYPES_PAR_SLOT, InventaireModules, InventaireShells, repartir_slots, vecteurs_personnage
+
+
+def slots_equipes(module_ids, inventaire) -> np.ndarray:
+    """Indices dans l'inventaire des modules équipés, par emplacement (voir repartir_slots) ; -1 si vide."""
+    def type_de(mid):
+        i = inventaire.index_ids.get(mid)
+        return None if i is None else inventaire.types[i]
+    return np.array([-1 if mid is None else inventaire.index_ids[mid]
+                     for mid in repartir_slots(module_ids, type_de)], dtype=np.intp)
+
+
+def gains_echange(personnage, modules, objectif=None, shells=(), top_n=10, bonus_effets=None):
+    """
+    Pour chacun des six emplacements, gain de l'objectif si l'on remplace le module
+    équipé par chaque module de l'inventaire du bon type (non déjà équipé).
+
+    Tous les candidats de tous les emplacements sont évalués en un seul appel à
+    l'objectif : totaux candidats = totaux actuels - module retiré + module ajouté.
+    Retourne une liste de six dicts {slot, type, actuel, meilleurs: [{id, gain}]},
+    `meilleurs` trié par gain décroissant et limité à `top_n`. `bonus_effets` : voir
+    InventaireShells.
+    """
+    objectif = objectif or ObjectifPondere({s: 1 for s in STATS})
+    inventaire = modules if isinstance(modules, InventaireModules) else InventaireModules(modules)
+    fixe, base = vecteurs_personnage(personnage)
+    effectifs = inventaire.effectifs(base)
+    # ligne nulle en fin de tableau : l'indice -1 (emplacement vide) ne retire rien
+    effectifs = np.vstack([effectifs, np.zeros((1, len(STATS)))])
+
+    slots = slots_equipes(personnage.get("modules", []), inventaire)
+    actuels = fixe + effectifs[slots].sum(axis=0)
+    shell_id = personnage.get("shell")
+    if shell_id is not None and len(shells):
+        inv_shells = shells if isinstance(shells, InventaireShells) else InventaireShells(list(shells), bonus_effets)
+        i_shell = inv_shells.index_ids.get(shell_id)
+        if i_shell is not None:
+            actuels = actuels + inv_shells.effectifs(base)[i_shell]
+
+    libres = np.ones(len(inventaire), dtype=bool)
+    libres[slots[slots >= 0]] = False
+    candidats, emplacements = [], []
+    for s, type_slot in enumerate(TYPES_PAR_SLOT):
+        idx = inventaire.indices_type(type_slot, libres)
+        candidats.append(idx)
+        emplacements.append(np.full(len(idx), s, dtype=np.intp))
+    candidats = np.concatenate(candidats)
+    emplacements = np.concatenate(emplacements)
+
+    totaux = actuels - effectifs[slots[emplacements]] + effectifs[candidats]
+    gains = objectif(totaux) - objectif(actuels[None, :])[0]
+
+    resultat = []
+    for s, type_slot in enumerate(TYPES_PAR_SLOT):
+        masque = emplacements == s
+        idx, g = candidats[masque], gains[masque]
+        if len(g) > top_n:
+            garde = np.argpartition(-g, top_n - 1)[:top_n]
+            idx, g = idx[garde], g[garde]
+        ordre = np.argsort(-g, kind="stable")
+        resultat.append({
+            "slot": s,
+            "type": type_slot,
+            "actuel": inventaire.ids[slots[s]] if slots[s] >= 0 else None,
+            "meilleurs": [{"id": inventaire.ids[i], "gain": float(v)} for i, v in zip(idx[ordre], g[ordre])],
+        })
+    return resultat
@@ -0,0 +1,79 @@
+import numpy as np
+
+from .recherche_build import RechercheBuild, ObjectifPondere
+from .scores import objectif_metrique
+from .stats import STATS, InventaireModules, InventaireShells
+
+# Recherche plus resserrée par personnage : un roster de 20 doit tenir en quelques secondes
+OPTIONS_EQUIPE = {"candidats_par_slot": 4, "candidats_noyau": 10, "candidats_shell": 4}
+
+
+def objectif_personnage(perso):
+    """
+    Objectif déclaré dans la fiche : nom de métrique/stat (`"objectif": "DPS"`)
+    ou pondération (`"objectif": {stat: poids}`) ; à défaut, somme des totaux.
+    """
+    objectif = perso.get("objectif")
+    if isinstance(objectif, str):
+        return objectif_metrique(objectif)
+    return ObjectifPondere(objectif or {s: 1 for s in STATS})
+
+
+def optimiser_equipe(personnages, modules, shells=(), objectifs=None, poids=None,
+                     bonus_effets=None, iterations=2, **options):
+    """
+    Répartit l'inventaire entre les personnages sans qu'un module (ou shell) soit
+    équipé deux fois.
+
+    1. Affectation gloutonne : par poids décroissant (à défaut, ordre de la liste),
+       chaque personnage prend le meilleur build parmi ce qui reste.
+    2. Recherche locale : on relâche tour à tour l'équipement d'un personnage et
+       on le réoptimise face aux autres ; un changement n'est gardé que s'il
+       améliore son score, donc le total pondéré ne peut que croître.
+
+    Retourne une liste alignée sur `personnages` de dicts
+    {nom, modules, shell, score, totaux}.
+    """
+    n = len(personnages)
+    objectifs = objectifs or [objectif_personnage(p) for p in personnages]
+    poids = list(poids) if poids is not None else [1.0] * n
+    options = {**OPTIONS_EQUIPE, **options}
+
+    inventaire = modules if isinstance(modules, InventaireModules) else InventaireModules(modules)
+    inv_shells = shells if isinstance(shells, InventaireShells) else InventaireShells(list(shells), bonus_effets)
+    libres = np.ones(len(inventaire), dtype=bool)
+    shells_libres = np.ones(len(inv_shells), dtype=bool)
+    resultats = [None] * n
+
+    def equiper(i, build, etat):
+        for mid in build["modules"]:
+            if mid is not None:
+                libres[inventaire.index_ids[mid]] = etat
+        if build["shell"] is not None:
+            shells_libres[inv_shells.index_ids[build["shell"]]] = etat
+
+    def chercher(i):
+        recherche = RechercheBuild(
+            personnages[i], inventaire, inv_shells, objectifs[i],
+            disponibles=libres, shells_disponibles=shells_libres, **options
+        )
+        return recherche.executer(top_k=1)[0]
+
+    ordre = sorted(range(n), key=lambda i: -poids[i])
+    for i in ordre:
+        resultats[i] = chercher(i)
+        equiper(i, resultats[i], False)
+
+    for _ in range(iterations):
+        ameliore = False
+        for i in ordre:
+            equiper(i, resultats[i], True)
+            candidat = chercher(i)
+            if candidat["score"] > resultats[i]["score"] + 1e-9:
+                resultats[i] = candidat
+                ameliore = True
+            equiper(i, resultats[i], False)
+        if not ameliore:
+            break
+
+    return [{"nom": p.get("nom"), **r} for p, r in zip(personnages, resultats)]
@@ -0,0 +1,84 @@
+import unicodedata
+
+import numpy as np
+
+from ..modules.gestion_modules import en_dicts
+
+NIVEAU_MAX = 15
+
+
+def cle_stat(nom):
+    """Normalise un nom de stat pour la comparaison (minuscules, sans accents ni espaces)."""
+    nom = unicodedata.normalize("NFKD", str(nom or ""))
+    nom = "".join(c for c in nom if not unicodedata.combining(c))
+    return nom.replace(" ", "").lower()
+
+
+class TableProjection:
+    """
+    Table des valeurs de stat principale par niveau, construite une seule fois
+    depuis stats_par_type.json : une ligne par couple (type, stat), une colonne par niveau.
+    Les niveaux absents du fichier valent NaN.
+    """
+
+    def __init__(self, data: dict):
+        self.lignes = {}
+        valeurs = []
+        for type_module, entry in (data or {}).items():
+            t = type_module.lower()
+            if "main_stat" in entry:
+                series = {entry["main_stat"]: entry.get("par_niveau", {})}
+            else:
+                # noyau : {stat: {niveau: valeur}}
+                series = entry
+            for stat, par_niveau in series.items():
+                ligne = np.full(NIVEAU_MAX + 1, np.nan)
+                for niveau, valeur in par_niveau.items():
+                    n = int(niveau)
+                    if 0 <= n <= NIVEAU_MAX and valeur is not None:
+                        ligne[n] = valeur
+                self.lignes[f"{t}|{cle_stat(stat)}"] = len(valeurs)
+                valeurs.append(ligne)
+        self.valeurs = np.array(valeurs).reshape(-1, NIVEAU_MAX + 1)
+
+    def index_lignes(self, types, stats) -> np.ndarray:
+        """Index de ligne pour chaque module (-1 si le couple type/stat est inconnu)."""
+        cles = np.array([f"{str(t).lower()}|{cle_stat(s)}" for t, s in zip(types, stats)], dtype=object)
+        if len(cles) == 0:
+            return np.empty(0, dtype=np.intp)
+        uniques, inverse = np.unique(cles.astype(str), return_inverse=True)
+        lignes_uniques = np.array([self.lignes.get(c, -1) for c in uniques], dtype=np.intp)
+        return lignes_uniques[inverse.reshape(-1)]
+
+    def projeter(self, lignes, niveaux, valeurs, niveau_cible=NIVEAU_MAX) -> np.ndarray:
+        """
+        Valeur de stat principale au niveau cible pour tout un inventaire, en une passe.
+        Garde la valeur actuelle si le module est déjà au-delà du niveau cible
+        ou si la table ne connaît pas ce niveau.
+        """
+        lignes = np.asarray(lignes, dtype=np.intp)
+        niveaux = np.asarray(niveaux, dtype=np.intp)
+        valeurs = np.asarray(valeurs, dtype=float)
+        cible = int(np.clip(niveau_cible, 0, NIVEAU_MAX))
+        if len(self.valeurs) == 0:
+            return valeurs.copy()
+        connues = lignes >= 0
+        projetees = np.where(connues, self.valeurs[np.where(connues, lignes, 0), cible], np.nan)
+        a_projeter = connues & (niveaux < cible) & ~np.isnan(projetees)
+        return np.where(a_projeter, projetees, valeurs)
+
+
+def projeter_modules(modules, data, niveau_cible=NIVEAU_MAX, table=None) -> np.ndarray:
+    """
+    Projette la stat principale de chaque module (objets Module ou dicts) au niveau cible.
+    Retourne un tableau aligné sur la liste `modules`.
+    """
+    table = table or TableProjection(data)
+    dicts = en_dicts(modules)
+    lignes = table.index_lignes(
+        [d.get("type", "") for d in dicts],
+        [d.get("stat_principale", "") for d in dicts],
+    )
+    niveaux = np.fromiter((d.get("niveau", 0) or 0 for d in dicts), dtype=np.intp, count=len(dicts))
+    valeurs = np.fromiter((d.get("valeur_principale", 0) or 0 for d in dicts), dtype=float, count=len(dicts))
+    return table.projeter(lignes, niveaux, valeurs, niveau_cible)
@@ -0,0 +1,165 @@
+from itertools import combinations
+
+import numpy as np
+
+from .projection import projeter_modules
+from .stats import STATS, TYPES_PAR_SLOT, InventaireModules, InventaireShells, vecteurs_personnage
+
+
+class ObjectifPondere:
+    """
+    Objectif linéaire : somme pondérée des totaux, ex. {"Attaque": 1, "Vitesse": 3}.
+    Classe plutôt que fermeture pour rester sérialisable vers des processus.
+    """
+
+    def __init__(self, poids: dict):
+        self.poids = np.array([poids.get(s, 0) for s in STATS], dtype=float)
+
+    def __call__(self, totaux):
+        return np.atleast_2d(totaux) @ self.poids
+
+
+class RechercheBuild:
+    """
+    Recherche du meilleur ensemble (6 modules + 1 shell) pour un personnage.
+
+    Les contributions de chaque module/shell sont précalculées en vecteurs ; on
+    garde pour chaque emplacement les meilleurs candidats (gain seul sur l'objectif),
+    puis on évalue par lots NumPy toutes les combinaisons casque × transitor ×
+    noyaux × shell. `objectif` prend un tableau (B, len(STATS)) de totaux et
+    retourne (B,) scores ; `contrainte` (facultative, même entrée) retourne (B,)
+    booléens et écarte les builds qui ne la respectent pas (ex. ContrainteOrdre).
+    """
+
+    def __init__(self, personnage, modules, shells=(), objectif=None, niveau_cible=None,
+                 stats_par_type=None, bonus_effets=None, disponibles=None, shells_disponibles=None,
+                 candidats_par_slot=8, candidats_noyau=16, candidats_shell=8, contrainte=None):
+        self.objectif = objectif or ObjectifPondere({s: 1 for s in STATS})
+        self.contrainte = contrainte
+        self.fixe, self.base = vecteurs_personnage(personnage)
+
+        if isinstance(modules, InventaireModules):
+            self.inventaire = modules
+        else:
+            valeurs = None
+            if niveau_cible is not None:
+                valeurs = projeter_modules(modules, stats_par_type, niveau_cible)
+            self.inventaire = InventaireModules(modules, valeurs)
+        if isinstance(shells, InventaireShells):
+            self.shells = shells
+        else:
+            self.shells = InventaireShells(list(shells), bonus_effets)
+
+        effectifs = self.inventaire.effectifs(self.base)
+        score_seul = self._gain_seul(effectifs)
+
+        # Casque et transitor : un emplacement chacun
+        self.slots = []
+        for type_module in TYPES_PAR_SLOT[:2]:
+            idx = self.inventaire.indices_type(type_module, disponibles)
+            idx = self._meilleurs(idx, score_seul, candidats_par_slot)
+            self.slots.append(self._options(idx, effectifs))
+
+        # Noyaux : combinaisons sans répétition parmi les meilleurs candidats
+        nb_noyaux = TYPES_PAR_SLOT.count("noyau")
+        idx = self.inventaire.indices_type("noyau", disponibles)
+        idx = self._meilleurs(idx, score_seul, candidats_noyau)
+        if len(idx):
+            combos = np.array(list(combinations(idx, min(nb_noyaux, len(idx)))), dtype=np.intp)
+        else:
+            combos = np.empty((1, 0), dtype=np.intp)
+        self.combos_noyaux = combos
+        self.vecteurs_noyaux = effectifs[combos].sum(axis=1)
+
+        # Shell : dimension supplémentaire
+        eff_shells = self.shells.effectifs(self.base)
+        idx_s = np.arange(len(self.shells))
+        if shells_disponibles is not None:
+            idx_s = idx_s[shells_disponibles]
+        idx_s = self._meilleurs(idx_s, self._gain_seul(eff_shells), candidats_shell)
+        self.options_shell = self._options(idx_s, eff_shells)
+
+        self.dimensions = (
+            len(self.slots[0][0]), len(self.slots[1][0]),
+            len(self.combos_noyaux), len(self.options_shell[0]),
+        )
+
+    def _gain_seul(self, effectifs):
+        if len(effectifs) == 0:
+            return np.empty(0)
+        return self.objectif(self.fixe + effectifs) - self.objectif(self.fixe[None, :])
+
+    @staticmethod
+    def _meilleurs(idx, scores, n):
+        if len(idx) <= n:
+            return idx
+        garde = np.argpartition(-scores[idx], n - 1)[:n]
+        return idx[garde]
+
+    @staticmethod
+    def _options(idx, effectifs):
+        """(indices, vecteurs) ; un seul choix « vide » si aucun candidat."""
+        if len(idx) == 0:
+            return np.array([-1], dtype=np.intp), np.zeros((1, len(STATS)))
+        return idx, effectifs[idx]
+
+    @property
+    def total(self) -> int:
+        return int(np.prod(self.dimensions))
+
+    def evaluer(self, debut, fin):
+        """Scores et totaux des builds d'indices [debut, fin) de l'espace de recherche."""
+        flat = np.arange(debut, fin)
+        i_c, i_t, i_n, i_s = np.unravel_index(flat, self.dimensions)
+        totaux = (self.fixe + self.slots[0][1][i_c] + self.slots[1][1][i_t]
+                  + self.vecteurs_noyaux[i_n] + self.options_shell[1][i_s])
+        scores = self.objectif(totaux)
+        if self.contrainte is not None:
+            scores = np.where(self.contrainte(totaux), scores, -np.inf)
+        return scores, totaux
+
+    def decrire(self, flat, score, totaux) -> dict:
+        """Convertit un indice de build en dict {modules, shell, score, totaux}."""
+        i_c, i_t, i_n, i_s = np.unravel_index(int(flat), self.dimensions)
+        ids = self.inventaire.ids
+        choix = [self.slots[0][0][i_c], self.slots[1][0][i_t], *self.combos_noyaux[i_n]]
+        modules = [ids[i] if i >= 0 else None for i in choix]
+        modules += [None] * (len(TYPES_PAR_SLOT) - len(modules))
+        i_shell = self.options_shell[0][i_s]
+        return {
+            "modules": modules,
+            "shell": self.shells.ids[i_shell] if i_shell >= 0 else None,
+            "score": float(score),
+            "totaux": {s: float(v) for s, v in zip(STATS, totaux)},
+        }
+
+    def iterer(self, top_k=10, taille_lot=50_000):
+        """
+        Parcourt l'espace par lots et produit après chaque lot
+        (nombre de builds évalués, top-K courant trié par score décroissant).
+        """
+        meilleurs_idx = np.empty(0, dtype=np.int64)
+        meilleurs_scores = np.empty(0)
+        meilleurs_totaux = np.empty((0, len(STATS)))
+        total = self.total
+        for debut in range(0, total, taille_lot):
+            fin = min(total, debut + taille_lot)
+            scores, totaux = self.evaluer(debut, fin)
+            valides = np.isfinite(scores)
+            idx = np.concatenate([meilleurs_idx, np.arange(debut, fin)[valides]])
+            scores, totaux = scores[valides], totaux[valides]
+            scores = np.concatenate([meilleurs_scores, scores])
+            totaux = np.concatenate([meilleurs_totaux, totaux])
+            if len(scores) > top_k:
+                garde = np.argpartition(-scores, top_k - 1)[:top_k]
+                idx, scores, totaux = idx[garde], scores[garde], totaux[garde]
+            ordre = np.argsort(-scores, kind="stable")
+            meilleurs_idx, meilleurs_scores, meilleurs_totaux = idx[ordre], scores[ordre], totaux[ordre]
+            yield fin, [self.decrire(i, s, t) for i, s, t in zip(meilleurs_idx, meilleurs_scores, meilleurs_totaux)]
+
+    def executer(self, top_k=10, taille_lot=50_000):
+        """Recherche complète ; retourne le top-K final."""
+        resultat = []
+        for _, resultat in self.iterer(top_k, taille_lot):
+            pass
+        return resultat
@@ -0,0 +1,76 @@
+"""
+Métriques dérivées calculées sur des tableaux de totaux de forme (B, len(STATS)),
+ordre des colonnes de STATS. Chaque fonction retourne un tableau (B,).
+"""
+from functools import partial
+
+import numpy as np
+
+from .projection import cle_stat
+from .stats import INDEX_STATS, STATS
+
+_PV = STATS.index("PV")
+_ATK = STATS.index("Attaque")
+_DEF = STATS.index("Defense")
+_VIT = STATS.index("Vitesse")
+_TC = STATS.index("Taux crit")
+_DC = STATS.index("Degats crit")
+
+# Défense pour laquelle les dégâts subis sont divisés par deux
+DEFENSE_REFERENCE = 1000.0
+# Vitesse correspondant à un tour par unité de temps
+VITESSE_REFERENCE = 100.0
+
+
+def pv_effectifs(totaux, defense_reference=DEFENSE_REFERENCE):
+    """PV × (1 + Défense / référence) : dégâts bruts encaissables avant de tomber."""
+    totaux = np.atleast_2d(totaux)
+    return totaux[:, _PV] * (1 + np.maximum(totaux[:, _DEF], 0) / defense_reference)
+
+
+def degats_moyens(totaux):
+    """
+    Dégâts moyens par coup : Attaque × (1 + P(crit) × Degats crit / 100),
+    le taux crit étant plafonné à 100 % et les dégâts crit lus comme un bonus en %.
+    """
+    totaux = np.atleast_2d(totaux)
+    p_crit = np.clip(totaux[:, _TC], 0, 100) / 100
+    return totaux[:, _ATK] * (1 + p_crit * np.maximum(totaux[:, _DC], 0) / 100)
+
+
+def dps(totaux, vitesse_reference=VITESSE_REFERENCE):
+    """Dégâts moyens pondérés par la fréquence de jeu (Vitesse / référence)."""
+    totaux = np.atleast_2d(totaux)
+    return degats_moyens(totaux) * np.maximum(totaux[:, _VIT], 0) / vitesse_reference
+
+
+METRIQUES = {
+    "PV eff.": pv_effectifs,
+    "Dégâts/coup": degats_moyens,
+    "DPS": dps,
+}
+
+
+def calculer_metriques(totaux) -> dict:
+    """{nom de métrique: tableau (B,)} pour un lot de builds."""
+    totaux = np.atleast_2d(np.asarray(totaux, dtype=float))
+    return {nom: f(totaux) for nom, f in METRIQUES.items()}
+
+
+def objectif_metrique(nom):
+    """
+    Objectif de recherche de build à partir d'une métrique (« DPS », « PV eff. »...) ou d'une stat.
+    ValueError si le nom n'est ni l'une ni l'autre.
+    """
+    if nom in METRIQUES:
+        return METRIQUES[nom]
+    idx = INDEX_STATS.get(cle_stat(nom))
+    if idx is None:
+        raise ValueError(
+            f"Objectif inconnu : « {nom} » (attendu : {', '.join([*METRIQUES, *STATS])})"
+        )
+    return partial(_valeur_stat, idx=idx)
+
+
+def _valeur_stat(totaux, idx):
+    return np.atleast_2d(totaux)[:, idx]
@@ -0,0 +1,152 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ..modules.gestion_modules import SUBSTATS, en_dicts
+from .projection import NIVEAU_MAX, projeter_modules
+from .stats import STATS, normaliser_stat, cle_stat
+
+# Niveaux auxquels un module reçoit un jet de sous-stat
+PALIERS_AMELIORATION = (3, 6, 9, 12, 15)
+NB_SOUS_STATS_MAX = 4
+
+# Valeur d'un jet par sous-stat : (min, max) inclus, tirage uniforme entier
+TABLE_JETS = {
+    "Attaque": (10, 20), "Attaque%": (4, 8),
+    "PV": (100, 200), "PV%": (4, 8),
+    "Defense": (10, 20), "Defense%": (4, 8),
+    "Taux crit": (3, 6), "Degats crit": (4, 8),
+    "Resistance": (4, 8), "Precision": (4, 8),
+    "Vitesse": (3, 6),
+}
+
+# Modules simulés ensemble : fixe le découpage, donc les graines, quel que soit le nombre de processus
+TAILLE_PAQUET = 32
+
+_INDEX_SUBSTATS = {cle_stat(s): i for i, s in enumerate(SUBSTATS)}
+
+
+def _matrices_substats():
+    """Contribution d'un point de chaque sous-stat, en plat et en %, sur les colonnes de STATS."""
+    plat = np.zeros((len(SUBSTATS), len(STATS)))
+    pourcent = np.zeros((len(SUBSTATS), len(STATS)))
+    for i, nom in enumerate(SUBSTATS):
+        idx, est_pourcent = normaliser_stat(nom)
+        if idx is not None:
+            (pourcent if est_pourcent else plat)[i, idx] = 1
+    return plat, pourcent
+
+
+def nb_jets(niveau, niveau_cible=NIVEAU_MAX):
+    """Nombre de jets restants entre le niveau actuel (exclu) et le niveau cible (inclus)."""
+    return sum(1 for p in PALIERS_AMELIORATION if niveau < p <= niveau_cible)
+
+
+def _encoder(modules, niveau_cible):
+    """Sous-stats présentes, stat principale exclue des tirages et nombre de jets par module."""
+    presentes = np.zeros((len(modules), len(SUBSTATS)), dtype=bool)
+    exclues = np.zeros_like(presentes)
+    jets = np.zeros(len(modules), dtype=np.intp)
+    for i, d in enumerate(en_dicts(modules)):
+        for sub in d.get("sous_stats", []):
+            j = _INDEX_SUBSTATS.get(cle_stat(sub.get("stat")))
+            if j is not None:
+                presentes[i, j] = True
+        j = _INDEX_SUBSTATS.get(cle_stat(d.get("stat_principale")))
+        if j is not None:
+            exclues[i, j] = True
+        jets[i] = nb_jets(d.get("niveau", 0) or 0, niveau_cible)
+    return presentes, exclues, jets
+
+
+def _simuler_paquet(args):
+    """
+    Simule `n_tirages` séquences de jets pour un paquet de modules, toutes en même temps :
+    chaque ligne du lot est un couple (module, tirage).
+    """
+    presentes, exclues, jets, principal, bornes, objectif, base, reference, n_tirages, graine, quantiles = args
+    rng = np.random.default_rng(graine)
+    n_mod, n_sub = presentes.shape
+    presentes = np.repeat(presentes, n_tirages, axis=0)
+    autorisees_nouvelles = ~np.repeat(exclues, n_tirages, axis=0)
+    restants = np.repeat(jets, n_tirages)
+    gains_sub = np.zeros((len(presentes), n_sub))
+
+    for _ in range(int(jets.max(initial=0))):
+        actifs = restants > 0
+        # moins de 4 sous-stats : une nouvelle apparaît, sinon une existante progresse
+        nouvelle = presentes.sum(axis=1) < NB_SOUS_STATS_MAX
+        choix_possibles = np.where(nouvelle[:, None], ~presentes & autorisees_nouvelles, presentes)
+        cles = np.where(choix_possibles, rng.random(choix_possibles.shape), -1.0)
+        choisie = cles.argmax(axis=1)
+        valide = actifs & (cles.max(axis=1) >= 0)
+        valeurs = rng.integers(bornes[choisie, 0], bornes[choisie, 1] + 1)
+        lignes = np.flatnonzero(valide)
+        gains_sub[lignes, choisie[lignes]] += valeurs[lignes]
+        presentes[lignes, choisie[lignes]] = True
+        restants -= actifs
+
+    plat, pourcent = _matrices_substats()
+    effectif = gains_sub @ plat + (gains_sub @ pourcent) * (base / 100) + np.repeat(principal, n_tirages, axis=0)
+    gains = objectif(reference + effectif) - objectif(reference[None, :])
+    gains = gains.reshape(n_mod, n_tirages)
+    return gains.mean(axis=1), np.quantile(gains, quantiles, axis=1).T
+
+
+def _gains_principaux(modules, stats_par_type, niveau_cible, base):
+    """Progression déterministe de la stat principale jusqu'au niveau cible, en vecteurs de stats."""
+    gains = np.zeros((len(modules), len(STATS)))
+    if stats_par_type is None:
+        return gains
+    dicts = en_dicts(modules)
+    delta = projeter_modules(dicts, stats_par_type, niveau_cible) - np.array(
+        [d.get("valeur_principale", 0) or 0 for d in dicts], dtype=float)
+    for i, d in enumerate(dicts):
+        idx, est_pourcent = normaliser_stat(d.get("stat_principale"))
+        if idx is not None:
+            gains[i, idx] = delta[i] * (base[idx] / 100 if est_pourcent else 1)
+    return gains
+
+
+def simuler_ameliorations(modules, objectif, base=None, reference=None, niveau_cible=NIVEAU_MAX,
+                          n_tirages=2000, table_jets=None, stats_par_type=None, graine=0,
+                          processus=1, contexte_mp=None, quantiles=(0.1, 0.5, 0.9)):
+    """
+    Monte Carlo des jets de sous-stats jusqu'au niveau cible pour chaque module.
+
+    `objectif` : callable (B, len(STATS)) -> (B,), évalué sur `reference + gain`
+    (totaux de référence du personnage ; `base` sert d'assiette aux sous-stats en %).
+    Avec `stats_par_type`, la progression de la stat principale est ajoutée au gain.
+    Résultats reproductibles pour une même `graine`, quel que soit `processus`.
+    `contexte_mp` : contexte multiprocessing du pool (ex. « spawn » depuis l'interface).
+
+    Retourne, aligné sur `modules`, une liste de dicts
+    {id, jets, esperance, quantiles: {q: gain}}.
+    """
+    table_jets = {**TABLE_JETS, **(table_jets or {})}
+    bornes = np.array([table_jets[s] for s in SUBSTATS], dtype=np.int64)
+    base = np.zeros(len(STATS)) if base is None else np.asarray(base, dtype=float)
+    reference = np.zeros(len(STATS)) if reference is None else np.asarray(reference, dtype=float)
+    presentes, exclues, jets = _encoder(modules, niveau_cible)
+    principal = _gains_principaux(modules, stats_par_type, niveau_cible, base)
+
+    graines = np.random.SeedSequence(graine).spawn(max(1, -(-len(modules) // TAILLE_PAQUET)))
+    paquets = [
+        (presentes[d:d + TAILLE_PAQUET], exclues[d:d + TAILLE_PAQUET], jets[d:d + TAILLE_PAQUET],
+         principal[d:d + TAILLE_PAQUET], bornes, objectif, base, reference, n_tirages, g, np.asarray(quantiles))
+        for d, g in zip(range(0, len(modules), TAILLE_PAQUET), graines)
+    ]
+    if processus > 1 and len(paquets) > 1:
+        with ProcessPoolExecutor(max_workers=processus, mp_context=contexte_mp) as pool:
+            sorties = list(pool.map(_simuler_paquet, paquets))
+    else:
+        sorties = [_simuler_paquet(p) for p in paquets]
+
+    resultats = []
+    for paquet, (esperances, qs) in zip(paquets, sorties):
+        for j, esperance, q in zip(paquet[2], esperances, qs):
+            resultats.append({"jets": int(j), "esperance": float(esperance),
+                              "quantiles": {float(k): float(v) for k, v in zip(quantiles, q)}})
+    for m, r in zip(modules, resultats):
+        r["id"] = m.get("id") if isinstance(m, dict) else m.id
+    return resultats
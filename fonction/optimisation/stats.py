@@ -0,0 +1,165 @@
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from ..modules.gestion_modules import en_dicts
+from .projection import cle_stat
+
+# Colonnes des totaux d'un personnage (même ordre que la table des personnages)
+STATS = ["PV", "Attaque", "Defense", "Vitesse", "Taux crit", "Degats crit", "Resistance", "Precision"]
+INDEX_STATS = {cle_stat(s): i for i, s in enumerate(STATS)}
+
+# Stats pour lesquelles un bonus en % s'applique à la valeur de base
+STATS_POURCENT = {"PV", "Attaque", "Defense"}
+
+# Type de module attendu pour chacun des six emplacements d'un personnage
+TYPES_PAR_SLOT = ("casque", "transitor", "noyau", "noyau", "noyau", "noyau")
+
+
+def repartir_slots(module_ids, type_de) -> list:
+    """
+    Place des modules dans les six emplacements selon leur type (`type_de(id)`,
+    None si inconnu) ; None pour un emplacement vide. Accepte la liste compacte
+    de la fiche (`data["modules"]`) comme la liste alignée sur les emplacements
+    (avec des None) du dialogue : un module garde sa position si elle convient.
+    """
+    slots = [None] * len(TYPES_PAR_SLOT)
+    for position, mid in enumerate(module_ids):
+        if mid is None:
+            continue
+        type_module = type_de(mid)
+        libres = [s for s, type_slot in enumerate(TYPES_PAR_SLOT)
+                  if slots[s] is None and type_module == type_slot]
+        if libres:
+            slots[position if position in libres else libres[0]] = mid
+    return slots
+
+
+@lru_cache(maxsize=None)
+def normaliser_stat(nom):
+    """
+    Retourne (index de colonne, est_pourcent) pour un nom de stat tel que stocké
+    ("Attaque%", "Attaque %", "Défense"...), ou (None, False) si la stat est inconnue.
+    """
+    cle = cle_stat(nom)
+    pourcent = cle.endswith("%")
+    idx = INDEX_STATS.get(cle.rstrip("%"))
+    if idx is None or (pourcent and STATS[idx] not in STATS_POURCENT):
+        return None, False
+    return idx, pourcent
+
+
+def _ajouter(plat, pourcent, ligne, nom, valeur):
+    idx, est_pourcent = normaliser_stat(nom)
+    if idx is None:
+        return
+    if est_pourcent:
+        pourcent[ligne, idx] += valeur or 0
+    else:
+        plat[ligne, idx] += valeur or 0
+
+
+def vecteurs_personnage(perso: dict):
+    """Retourne (fixe, base) : base+bonus par stat et base seule (assiette des %)."""
+    fixe = np.array([perso.get(s, {}).get("base", 0) + perso.get(s, {}).get("bonus", 0) for s in STATS], dtype=float)
+    base = np.array([perso.get(s, {}).get("base", 0) for s in STATS], dtype=float)
+    return fixe, base
+
+
+def lignes_module(d, valeur_principale=None):
+    """(stat, valeur) apportées par un module : stat principale puis sous-stats."""
+    valeur = d.get("valeur_principale", 0) if valeur_principale is None else valeur_principale
+    yield d.get("stat_principale"), valeur
+    for sub in d.get("sous_stats", []):
+        yield sub.get("stat"), sub.get("valeur", 0)
+
+
+def lignes_shell(s, bonus_effets=None):
+    """(stat, valeur) apportées par un shell : ses stats puis les bonus de ses effets × nombre."""
+    for st in s.get("stats", []):
+        yield st["stat"], st["valeur"]
+    for nom, nombre in s.get("effets", {}).items():
+        for stat, valeur in (bonus_effets or {}).get(nom, {}).items():
+            yield stat, valeur * nombre
+
+
+def totaux_personnage(perso, modules=(), shell=None, bonus_effets=None) -> dict:
+    """
+    Totaux {stat: valeur} d'un personnage équipé de `modules` (dicts) et `shell`,
+    avec les mêmes règles que les inventaires de la recherche de build :
+    noms normalisés par normaliser_stat, % appliqués à la base.
+    """
+    stats = [perso.get(s, {}) for s in STATS]
+    totaux = [st.get("base", 0) + st.get("bonus", 0) for st in stats]
+    base = [st.get("base", 0) for st in stats]
+    lignes = [l for d in modules for l in lignes_module(d)]
+    if shell:
+        lignes.extend(lignes_shell(shell, bonus_effets))
+    for stat, valeur in lignes:
+        idx, est_pourcent = normaliser_stat(stat)
+        if idx is None:
+            continue
+        totaux[idx] += base[idx] * (valeur or 0) / 100 if est_pourcent else (valeur or 0)
+    return dict(zip(STATS, totaux))
+
+
+class _Contributions:
+    """
+    Contributions plates et en % par stat d'une liste d'éléments (modules ou
+    shells), calculées une seule fois et alignées sur `ids`.
+    """
+
+    def __init__(self, ids, lignes):
+        self.ids = list(ids)
+        self.index_ids = {eid: i for i, eid in enumerate(self.ids)}
+        self.plat = np.zeros((len(self.ids), len(STATS)))
+        self.pourcent = np.zeros((len(self.ids), len(STATS)))
+        for i, lignes_element in enumerate(lignes):
+            for stat, valeur in lignes_element:
+                _ajouter(self.plat, self.pourcent, i, stat, valeur)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def effectifs(self, base) -> np.ndarray:
+        """Contribution de chaque élément aux totaux d'un personnage de base donnée."""
+        return self.plat + self.pourcent * (np.asarray(base, dtype=float) / 100)
+
+
+class InventaireModules(_Contributions):
+    """Encodage numérique d'un inventaire de modules, avec leur type pour filtrer par emplacement."""
+
+    def __init__(self, modules, valeurs_principales=None):
+        dicts = en_dicts(modules)
+        super().__init__(
+            (d.get("id") for d in dicts),
+            (lignes_module(d, None if valeurs_principales is None else valeurs_principales[i])
+             for i, d in enumerate(dicts)),
+        )
+        self.types = np.array([str(d.get("type", "")).strip().lower() for d in dicts], dtype=object)
+
+    def indices_type(self, type_module, disponibles=None) -> np.ndarray:
+        masque = self.types == type_module
+        if disponibles is not None:
+            masque &= disponibles
+        return np.flatnonzero(masque)
+
+
+class InventaireShells(_Contributions):
+    """
+    Encodage numérique des shells (format structuré du ShellManager) : les trois
+    stats et les bonus d'effets (`bonus_effets` = {effet: {stat: valeur par exemplaire}}).
+    """
+
+    def __init__(self, shells, bonus_effets=None):
+        super().__init__((s.get("id") for s in shells), (lignes_shell(s, bonus_effets) for s in shells))
+
+
+def charger_bonus_effets(path):
+    """Charge la table {effet: {stat: valeur par exemplaire}} (data/bonus_effets.json) si le fichier existe, sinon {}."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
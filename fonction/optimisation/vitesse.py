@@ -0,0 +1,82 @@
+"""
+Ordre des tours d'une équipe à partir des Vitesse totales.
+
+Modèle de jauge : la jauge de chaque personnage se remplit proportionnellement à
+sa Vitesse ; il joue quand elle atteint SEUIL_JAUGE, puis elle repart de zéro.
+La simulation avance d'événement en événement, vectorisée sur un lot de
+variantes (B, n) : chaque pas traite le prochain tour de toutes les variantes.
+"""
+import numpy as np
+
+from .stats import STATS
+
+SEUIL_JAUGE = 1000.0
+INDEX_VITESSE = STATS.index("Vitesse")
+
+
+def simuler_tours(vitesses, n_tours=10) -> np.ndarray:
+    """
+    vitesses : (n,) ou (B, n). Retourne (B, n_tours) : index du personnage qui
+    joue à chaque tour (-1 si personne ne peut jouer). À égalité, le plus rapide
+    joue d'abord, puis le premier de l'équipe.
+    """
+    v = np.atleast_2d(np.asarray(vitesses, dtype=float))
+    b = v.shape[0]
+    lignes = np.arange(b)
+    jauge = np.zeros_like(v)
+    sequence = np.empty((b, n_tours), dtype=np.intp)
+    for t in range(n_tours):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            attente = np.where(v > 0, (SEUIL_JAUGE - jauge) / v, np.inf)
+        dt = attente.min(axis=1, keepdims=True)
+        egaux = np.isclose(attente, dt, rtol=1e-12, atol=1e-12)
+        qui = np.argmax(np.where(egaux, v, -np.inf), axis=1)
+        possible = np.isfinite(dt[:, 0])
+        jauge += v * np.where(np.isfinite(dt), dt, 0)
+        jauge[lignes, qui] = np.where(possible, 0.0, jauge[lignes, qui])
+        sequence[:, t] = np.where(possible, qui, -1)
+    return sequence
+
+
+def respecte_ordre(sequences, ordre_cible) -> np.ndarray:
+    """(B,) vrai si les premiers tours suivent exactement `ordre_cible`."""
+    ordre_cible = np.asarray(ordre_cible, dtype=np.intp)
+    return (np.atleast_2d(sequences)[:, :len(ordre_cible)] == ordre_cible).all(axis=1)
+
+
+def vitesse_minimale(vitesses, ordre_cible, vitesse_max=None) -> list:
+    """
+    Pour chaque personnage (les autres restant fixes), la plus petite Vitesse entière
+    qui donne `ordre_cible` ; None si aucune dans [1, vitesse_max]. Toutes les
+    valeurs candidates d'un personnage sont simulées en un seul lot.
+    """
+    vitesses = np.asarray(vitesses, dtype=float)
+    if vitesse_max is None:
+        vitesse_max = int(2 * vitesses.max()) + 1
+    candidates = np.arange(1, vitesse_max + 1, dtype=float)
+    lot = np.repeat(vitesses[None, :], len(candidates), axis=0)
+    minimums = []
+    for j in range(len(vitesses)):
+        essai = lot.copy()
+        essai[:, j] = candidates
+        ok = np.flatnonzero(respecte_ordre(simuler_tours(essai, len(ordre_cible)), ordre_cible))
+        minimums.append(int(candidates[ok[0]]) if len(ok) else None)
+    return minimums
+
+
+class ContrainteOrdre:
+    """
+    Contrainte de recherche de build : le personnage `index` de l'équipe, avec les
+    totaux candidats (B, len(STATS)), doit laisser l'équipe jouer dans `ordre_cible`.
+    """
+
+    def __init__(self, vitesses_equipe, index, ordre_cible):
+        self.vitesses = np.asarray(vitesses_equipe, dtype=float)
+        self.index = index
+        self.ordre_cible = np.asarray(ordre_cible, dtype=np.intp)
+
+    def __call__(self, totaux):
+        totaux = np.atleast_2d(totaux)
+        lot = np.repeat(self.vitesses[None, :], len(totaux), axis=0)
+        lot[:, self.index] = totaux[:, INDEX_VITESSE]
+        return respecte_ordre(simuler_tours(lot, len(self.ordre_cible)), self.ordre_cible)
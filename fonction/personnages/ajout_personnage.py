@@ -1,17 +1,28 @@
 from PyQt5 import uic
-from PyQt5.QtWidgets import QDialog, QComboBox, QSpinBox, QLabel, QMessageBox
-from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtWidgets import (
+    QDialog, QComboBox, QSpinBox, QLabel, QMessageBox, QGroupBox, QVBoxLayout,
+    QHBoxLayout, QPushButton, QProgressBar, QListWidget, QListWidgetItem
+)
+from PyQt5.QtCore import Qt, pyqtSignal
 from pathlib import Path
-import json
 
-class AjoutPersonnageDialog(QDialog):
+from ..optimisation.echanges import gains_echange
+from ..optimisation.equipe import objectif_personnage
+from ..optimisation.stats import TYPES_PAR_SLOT, InventaireModules, repartir_slots
+from ..shell.gestion_shells import Shell
+from .recherche_async import RechercheWorker
+
+# Formulaire compilé une seule fois, à l'import (et non à chaque ouverture du dialogue)
+UI_PATH = Path(__file__).resolve().parent.parent.parent / "ui" / "ajout_personnage.ui"
+Ui_AjoutPersonnage, _ = uic.loadUiType(str(UI_PATH))
+
+class AjoutPersonnageDialog(QDialog, Ui_AjoutPersonnage):
     # signal émis à chaque changement de module/shell
     modulesChanged = pyqtSignal(dict)
 
-    def __init__(self, parent=None, modules_path=None, shells_path=None):
+    def __init__(self, parent=None):
         super().__init__(parent)
-        ui_path = Path(__file__).resolve().parent.parent.parent / "ui" / "ajout_personnage.ui"
-        uic.loadUi(str(ui_path), self)
+        self.setupUi(self)
 
         # Connexion des combos au signal
         for i in range(6):
@@ -21,10 +32,13 @@ class AjoutPersonnageDialog(QDialog):
         if hasattr(self, "comboShell"):
             self.comboShell.currentIndexChanged.connect(self._emit_modules_changed)
 
-        # Stockage des chemins et chargement
-        self.modules_path = modules_path
-        self.shells_path  = shells_path
-        self._load_modules_shells()
+        # Inventaire fourni par charger_inventaire (modules et shells en mémoire)
+        self.version_inventaire = None
+        self.modules = []
+        self.shells = []
+        self.inventaire = None
+        self.bonus_effets = {}
+        self.types_modules = {}
 
         # Limites, boutons…
         self.spinBoxNiveau.setMaximum(50)
@@ -34,84 +48,208 @@ class AjoutPersonnageDialog(QDialog):
         self.buttonValider.clicked.connect(self.on_valider)
         self.buttonAnnuler.clicked.connect(self.reject)
 
+        # Recherche de build en arrière-plan
+        self.objectif = None
+        self.recherche = None
+        self.resultats_recherche = []
+        self._init_recherche()
+
+    def _init_recherche(self):
+        """Bloc « Optimiser » : recherche en arrière-plan, top-K en direct, application en un clic."""
+        groupe = QGroupBox("Optimisation", self)
+        layout = QVBoxLayout(groupe)
+        boutons = QHBoxLayout()
+        self.buttonOptimiser = QPushButton("Optimiser")
+        self.buttonPause = QPushButton("Pause")
+        self.buttonStop = QPushButton("Annuler la recherche")
+        self.buttonAppliquer = QPushButton("Appliquer le meilleur")
+        self.buttonEchanges = QPushButton("Meilleurs échanges")
+        for b in (self.buttonOptimiser, self.buttonPause, self.buttonStop, self.buttonAppliquer,
+                  self.buttonEchanges):
+            boutons.addWidget(b)
+        layout.addLayout(boutons)
+        self.progressRecherche = QProgressBar()
+        self.progressRecherche.setRange(0, 1000)
+        self.labelRecherche = QLabel("")
+        self.listResultats = QListWidget()
+        self.listResultats.setMaximumHeight(120)
+        layout.addWidget(self.progressRecherche)
+        layout.addWidget(self.labelRecherche)
+        layout.addWidget(self.listResultats)
+        self.listEchanges = QListWidget()
+        self.listEchanges.setMaximumHeight(140)
+        layout.addWidget(self.listEchanges)
+        # juste au-dessus des boutons Valider / Annuler
+        self.verticalLayout.insertWidget(self.verticalLayout.count() - 1, groupe)
+
+        self.buttonOptimiser.clicked.connect(self.lancer_recherche)
+        self.buttonPause.clicked.connect(self.basculer_pause)
+        self.buttonStop.clicked.connect(self.arreter_recherche)
+        self.buttonAppliquer.clicked.connect(lambda: self.appliquer_build(0))
+        self.listResultats.itemDoubleClicked.connect(
+            lambda item: self.appliquer_build(item.data(Qt.UserRole)))
+        self.buttonEchanges.clicked.connect(self.analyser_echanges)
+        self.listEchanges.itemDoubleClicked.connect(self.appliquer_echange)
+        self._etat_recherche(False)
+
+    def _etat_recherche(self, en_cours):
+        self.buttonOptimiser.setEnabled(not en_cours)
+        self.buttonPause.setEnabled(en_cours)
+        self.buttonStop.setEnabled(en_cours)
+        self.buttonPause.setText("Pause")
+
+    def _objectif(self, perso):
+        """Objectif de la fiche ; None (avec un avertissement) s'il est invalide."""
+        try:
+            return objectif_personnage(perso)
+        except ValueError as e:
+            QMessageBox.warning(self, "Erreur", str(e))
+            return None
+
+    def lancer_recherche(self):
+        perso = self.get_data()
+        objectif = self._objectif(perso)
+        if objectif is None:
+            return
+        self.listResultats.clear()
+        self.resultats_recherche = []
+        self.recherche = RechercheWorker(perso, self.modules, self.shells,
+                                         objectif, parent=self,
+                                         bonus_effets=self.bonus_effets)
+        self.recherche.progression.connect(self._on_progression)
+        self.recherche.resultats.connect(self._on_resultats)
+        self.recherche.erreur.connect(lambda msg: QMessageBox.warning(self, "Erreur", msg))
+        self.recherche.termine.connect(self._on_termine)
+        self._etat_recherche(True)
+        self.recherche.start()
+
+    def basculer_pause(self):
+        if self.recherche is None:
+            return
+        pause = not self.recherche.en_pause
+        self.recherche.mettre_en_pause(pause)
+        self.buttonPause.setText("Reprendre" if pause else "Pause")
+
+    def arreter_recherche(self):
+        if self.recherche is not None:
+            self.recherche.annuler()
+
+    def _on_progression(self, evalues, total, debit, restant):
+        self.progressRecherche.setValue(int(1000 * evalues / max(total, 1)))
+        self.labelRecherche.setText(
+            f"{evalues:,} / {total:,} builds — {debit:,.0f} builds/s — reste ~{restant:.1f} s")
+
+    def _on_resultats(self, top):
+        self.resultats_recherche = top
+        self.listResultats.clear()
+        for rang, build in enumerate(top):
+            nb = sum(1 for m in build["modules"] if m)
+            item = QListWidgetItem(f"#{rang + 1}  score {build['score']:,.1f}  ({nb} modules)")
+            item.setData(Qt.UserRole, rang)
+            self.listResultats.addItem(item)
+
+    def _on_termine(self, annulee):
+        self._etat_recherche(False)
+        if annulee:
+            self.labelRecherche.setText(self.labelRecherche.text() + " — annulée")
+
+    def appliquer_build(self, rang):
+        """Place le build `rang` du top-K dans les six comboModule{i} (et la comboShell)."""
+        if rang >= len(self.resultats_recherche):
+            return
+        build = self.resultats_recherche[rang]
+        for i, module_id in enumerate(build["modules"]):
+            combo: QComboBox = getattr(self, f"comboModule{i}", None)
+            if combo:
+                combo.setCurrentIndex(max(combo.findData(module_id), 0))
+        if hasattr(self, "comboShell") and build["shell"] is not None:
+            index = self.comboShell.findData(build["shell"])
+            if index >= 0:
+                self.comboShell.setCurrentIndex(index)
+
+    def analyser_echanges(self, top_n=3):
+        """Pour chaque emplacement, les modules qui amélioreraient le plus l'objectif s'ils remplaçaient l'actuel."""
+        if self.inventaire is None:
+            self.inventaire = InventaireModules(self.modules)
+        perso = self.get_data()
+        perso["modules"] = [getattr(self, f"comboModule{i}").currentData() for i in range(6)]
+        objectif = self._objectif(perso)
+        if objectif is None:
+            return
+        analyse = gains_echange(perso, self.inventaire, objectif, self.shells, top_n,
+                                self.bonus_effets)
+        self.listEchanges.clear()
+        for slot in analyse:
+            combo = getattr(self, f"comboModule{slot['slot']}")
+            for e in slot["meilleurs"]:
+                if e["gain"] <= 0:
+                    break
+                texte = combo.itemText(combo.findData(e["id"]))
+                item = QListWidgetItem(f"Slot {slot['slot'] + 1} ({slot['type']}) : {texte}  +{e['gain']:,.1f}")
+                item.setData(Qt.UserRole, (slot["slot"], e["id"]))
+                self.listEchanges.addItem(item)
+        if self.listEchanges.count() == 0:
+            self.listEchanges.addItem("Aucun échange n'améliore l'objectif.")
+
+    def appliquer_echange(self, item):
+        choix = item.data(Qt.UserRole)
+        if not choix:
+            return
+        slot, module_id = choix
+        combo = getattr(self, f"comboModule{slot}")
+        combo.setCurrentIndex(max(combo.findData(module_id), 0))
+        self.analyser_echanges()
+
+    def done(self, r):
+        # Ne pas laisser tourner la recherche après la fermeture du dialogue
+        if self.recherche is not None and self.recherche.isRunning():
+            self.recherche.annuler()
+            self.recherche.wait()
+        super().done(r)
+
     def _emit_modules_changed(self, *_):
         """Émet le state courant du dialog pour MAJ live."""
         self.modulesChanged.emit(self.get_data())
 
 
-    def _load_modules_shells(self):
-        from pathlib import Path
-        import json
-
-        # 1) Lecture des deux JSON
-        self.modules = []
-        self.shells = []
+    def charger_inventaire(self, version, modules, shells, bonus_effets=None):
+        """
+        Inventaire fourni par l'appelant (en mémoire) : les combos ne sont
+        reconstruites que si la version a changé depuis le dernier remplissage.
+        """
+        self.bonus_effets = bonus_effets or {}
+        if version == self.version_inventaire:
+            return
+        self.version_inventaire = version
+        self.modules = list(modules)
+        self.shells = list(shells)
+        self._remplir_combos()
 
-        # Modules
-        if self.modules_path and Path(self.modules_path).exists():
-            print(f"[DEBUG] Lecture de {self.modules_path}")
-            with open(self.modules_path, encoding="utf-8") as f:
-                try:
-                    self.modules = json.load(f)
-                    print(f"[DEBUG] {len(self.modules)} modules chargés.")
-                except json.JSONDecodeError as e:
-                    print(f"[ERREUR] JSON modules invalide : {e}")
-        else:
-            print(f"[ERREUR] Chemin modules introuvable : {self.modules_path}")
-
-        # Affichage rapide du contenu
-        for m in self.modules:
-            print(f"→ Module: effet='{m.get('effet')}', type='{m.get('type')}', id='{m.get('id')}'")
-
-        # Shells
-        if self.shells_path and Path(self.shells_path).exists():
-            print(f"[DEBUG] Lecture de {self.shells_path}")
-            with open(self.shells_path, encoding="utf-8") as f:
-                try:
-                    self.shells = json.load(f)
-                    print(f"[DEBUG] {len(self.shells)} shells chargés.")
-                except json.JSONDecodeError as e:
-                    print(f"[ERREUR] JSON shells invalide : {e}")
-        else:
-            print(f"[ERREUR] Chemin shells introuvable : {self.shells_path}")
+    def _remplir_combos(self):
+        self.inventaire = None  # encodage numérique, reconstruit à la première analyse
+        self.types_modules = {m.get("id"): str(m.get("type", "")).strip().lower() for m in self.modules}
 
         # 2) Préparation du filtre par slot
-        types_par_slot = {
-            0: "casque",
-            1: "transitor",
-            2: "noyau",
-            3: "noyau",
-            4: "noyau",
-            5: "noyau",
-        }
+        types_par_slot = dict(enumerate(TYPES_PAR_SLOT))
 
         # 3) Pour chaque comboModule{i}, on vide, on ajoute "Aucun" puis les modules
         for i in range(6):
             combo: QComboBox = getattr(self, f"comboModule{i}", None)
             label: QLabel = getattr(self, f"labelTypeModule{i}", None)
             type_attendu = types_par_slot[i]
-
-            print(f"\n[Slot {i}] Type attendu : {type_attendu}")
-
             if combo is None:
-                print(f"  ❌ widget comboModule{i} introuvable")
                 continue
 
-            # On efface et on ajoute "Aucun"
+            # On efface et on ajoute "Aucun" (sans émettre modulesChanged à chaque ajout)
+            combo.blockSignals(True)
             combo.clear()
             combo.addItem("Aucun", None)
-            ajoutés = 0
 
             # On parcourt tous les modules chargés
             for m in self.modules:
-                m_type = str(m.get("type", "")).strip().lower()
-                if m_type == type_attendu:
-                    texte = f"{m.get('effet')} ({m_type})"
-                    combo.addItem(texte, m.get("id"))
-                    ajoutés += 1
-                    print(f"   ✅ Ajouté à {combo.objectName()}: {texte}")
-
-            print(f"   → {combo.objectName()} contient {combo.count()} items (dont 'Aucun')")
+                if str(m.get("type", "")).strip().lower() == type_attendu:
+                    combo.addItem(f"{m.get('effet')} ({type_attendu})", m.get("id"))
+            combo.blockSignals(False)
 
             # On met à jour le label « casque (Slot 1) », etc.
             if label:
@@ -119,15 +257,12 @@ class AjoutPersonnageDialog(QDialog):
 
         # 4) Pour la comboShell
         if hasattr(self, "comboShell"):
+            self.comboShell.blockSignals(True)
             self.comboShell.clear()
             self.comboShell.addItem("Aucun", None)
             for s in self.shells:
-                effet = s.get("effet", "Sans effet")
-                sid = s.get("id", "")
-                self.comboShell.addItem(effet, sid)
-                print(f"[Shell] Ajouté : {effet} (id={sid})")
-
-        print("===== [DEBUG] FIN CHARGEMENT MODULES/SHELLS =====\n")
+                self.comboShell.addItem(Shell.from_dict(s).libelle(), s["id"])
+            self.comboShell.blockSignals(False)
 
     def get_data(self):
         data = {
@@ -156,9 +291,23 @@ class AjoutPersonnageDialog(QDialog):
             shell_id = self.comboShell.currentData()
             data["shell"] = shell_id if shell_id else None
 
+        # Objectif de la fiche (non éditable ici) : rendu tel quel
+        if self.objectif is not None:
+            data["objectif"] = self.objectif
+
         return data
 
+    def reinitialiser(self, data=None):
+        """Remet le dialogue (réutilisé d'une ouverture à l'autre) à zéro, ou sur la fiche donnée."""
+        self.resultats_recherche = []
+        self.listResultats.clear()
+        self.listEchanges.clear()
+        self.progressRecherche.setValue(0)
+        self.labelRecherche.setText("")
+        self.remplir_champs(data or {})
+
     def remplir_champs(self, data):
+        self.objectif = data.get("objectif")
         self.lineEditNom.setText(data.get("nom", ""))
         self.spinBoxNiveau.setValue(data.get("niveau", 1))
 
@@ -168,21 +317,17 @@ class AjoutPersonnageDialog(QDialog):
             getattr(self, f"spinBox{stat.replace(' ', '')}Base").setValue(base)
             getattr(self, f"spinBox{stat.replace(' ', '')}Bonus").setValue(bonus)
 
-        # Modules
+        # Modules : la fiche stocke une liste compacte, on replace chaque module sur un slot de son type
+        slots = repartir_slots(data.get("modules", []), self.types_modules.get)
         for i in range(6):
             combo: QComboBox = getattr(self, f"comboModule{i}", None)
             if combo:
-                module_id = data.get("modules", [None]*6)[i] if i < len(data.get("modules", [])) else None
-                index = combo.findData(module_id)
-                if index >= 0:
-                    combo.setCurrentIndex(index)
+                combo.setCurrentIndex(max(combo.findData(slots[i]), 0) if slots[i] else 0)
 
         # Shell
         if hasattr(self, "comboShell"):
             shell_id = data.get("shell", None)
-            index = self.comboShell.findData(shell_id)
-            if index >= 0:
-                self.comboShell.setCurrentIndex(index)
+            self.comboShell.setCurrentIndex(max(self.comboShell.findData(shell_id), 0) if shell_id else 0)
 
     def on_valider(self):
         # Vérification du nom
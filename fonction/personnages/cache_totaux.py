@@ -0,0 +1,61 @@
+class CacheTotaux:
+    """
+    Totaux calculés de chaque personnage (alignés sur les positions du roster)
+    et index inverse module → positions des personnages qui l'équipent.
+
+    `calculer(perso)` est la fonction de calcul des totaux ; elle n'est appelée
+    qu'au chargement et pour les personnages touchés par une modification.
+    """
+
+    def __init__(self, calculer):
+        self.calculer = calculer
+        self.totaux = []
+        self.porteurs = {}
+
+    def __getitem__(self, pos):
+        return self.totaux[pos]
+
+    def __len__(self):
+        return len(self.totaux)
+
+    def reconstruire(self, persos):
+        self.totaux = [self.calculer(p) for p in persos]
+        self._reindexer(persos)
+
+    def _reindexer(self, persos):
+        self.porteurs = {}
+        for pos, p in enumerate(persos):
+            for mid in p.get("modules", []):
+                self.porteurs.setdefault(mid, set()).add(pos)
+
+    def porteurs_de(self, module_id) -> set:
+        """Positions des personnages qui équipent ce module."""
+        return self.porteurs.get(module_id, set())
+
+    def ajouter(self, perso):
+        pos = len(self.totaux)
+        self.totaux.append(self.calculer(perso))
+        for mid in perso.get("modules", []):
+            self.porteurs.setdefault(mid, set()).add(pos)
+
+    def mettre_a_jour(self, pos, ancien, nouveau):
+        for mid in ancien.get("modules", []):
+            self.porteurs.get(mid, set()).discard(pos)
+        for mid in nouveau.get("modules", []):
+            self.porteurs.setdefault(mid, set()).add(pos)
+        self.totaux[pos] = self.calculer(nouveau)
+
+    def supprimer(self, positions, persos_restants):
+        """Retire des positions ; les suivantes se décalent, l'index inverse est refait."""
+        retirees = set(positions)
+        self.totaux = [t for pos, t in enumerate(self.totaux) if pos not in retirees]
+        self._reindexer(persos_restants)
+
+    def invalider_modules(self, module_ids, persos) -> list:
+        """Recalcule uniquement les personnages qui équipent l'un des modules ; retourne leurs positions."""
+        touches = set()
+        for mid in module_ids:
+            touches |= self.porteurs_de(mid)
+        for pos in touches:
+            self.totaux[pos] = self.calculer(persos[pos])
+        return sorted(touches)
@@ -0,0 +1,121 @@
+from bisect import bisect_left, insort
+
+
+class IndexNoms:
+    """
+    Index de recherche par sous-chaîne sur les noms du roster.
+
+    Les noms sont mis en minuscules une seule fois ; chaque n-gramme (1 à 3
+    caractères) pointe vers la liste triée des positions qui le contiennent.
+    Les résultats sont mis en cache par terme, et un terme qui prolonge le
+    précédent (frappe clavier) est filtré à partir du résultat déjà connu.
+    """
+
+    TAILLE_NGRAMME = 3
+    TAILLE_CACHE = 256
+
+    def __init__(self, noms=()):
+        self.reconstruire(noms)
+
+    def reconstruire(self, noms):
+        self.noms = [str(n).lower() for n in noms]
+        self.ngrammes = {}
+        for pos, nom in enumerate(self.noms):
+            for g in self._ngrammes_de(nom):
+                self.ngrammes.setdefault(g, []).append(pos)
+        self._invalider()
+
+    def _ngrammes_de(self, nom):
+        return {nom[i:i + taille]
+                for taille in range(1, self.TAILLE_NGRAMME + 1)
+                for i in range(len(nom) - taille + 1)}
+
+    def _invalider(self):
+        self.cache = {"": list(range(len(self.noms)))}
+        self.dernier_terme = ""
+
+    def mettre_a_jour(self, pos, nom):
+        """
+        Nom de la position `pos` modifié (ou ajouté si `pos` == len) : seuls les
+        n-grammes de l'ancien et du nouveau nom sont touchés ; rien si le nom est inchangé.
+        """
+        nom = str(nom).lower()
+        if pos < len(self.noms):
+            ancien = self.noms[pos]
+            if ancien == nom:
+                return
+            self.noms[pos] = nom
+        else:
+            ancien = ""
+            self.noms.append(nom)
+        anciens, nouveaux = self._ngrammes_de(ancien), self._ngrammes_de(nom)
+        for g in anciens - nouveaux:
+            liste = self.ngrammes[g]
+            del liste[bisect_left(liste, pos)]
+            if not liste:
+                del self.ngrammes[g]
+        for g in nouveaux - anciens:
+            insort(self.ngrammes.setdefault(g, []), pos)
+        self._invalider()
+
+    def supprimer(self, positions):
+        """Retire des positions ; les suivantes se décalent dans chaque liste de n-grammes."""
+        retirees = sorted(set(positions))
+        if not retirees:
+            return
+        touches = set()
+        for pos in retirees:
+            touches |= self._ngrammes_de(self.noms[pos])
+        ensemble = set(retirees)
+        self.noms = [n for pos, n in enumerate(self.noms) if pos not in ensemble]
+        premiere = retirees[0]
+        for g, liste in list(self.ngrammes.items()):
+            debut = bisect_left(liste, premiere)
+            if debut == len(liste):
+                continue
+            if g in touches:
+                fin = [p - bisect_left(retirees, p) for p in liste[debut:] if p not in ensemble]
+            else:
+                fin = [p - bisect_left(retirees, p) for p in liste[debut:]]
+            liste[debut:] = fin
+            if not liste:
+                del self.ngrammes[g]
+        self._invalider()
+
+    def __len__(self):
+        return len(self.noms)
+
+    def rechercher(self, terme: str) -> list:
+        """Positions (ordre du roster) des noms contenant `terme`, sans tenir compte de la casse."""
+        terme = terme.lower()
+        resultat = self.cache.get(terme)
+        if resultat is None:
+            precedent = None
+            if self.dernier_terme and self.dernier_terme in terme:
+                precedent = self.cache.get(self.dernier_terme)
+            if precedent is not None:
+                resultat = [p for p in precedent if terme in self.noms[p]]
+            elif len(terme) <= self.TAILLE_NGRAMME:
+                # n-gramme indexé tel quel : la liste est déjà le résultat
+                resultat = self.ngrammes.get(terme, [])
+            else:
+                resultat = [p for p in self._candidats(terme) if terme in self.noms[p]]
+            if len(self.cache) >= self.TAILLE_CACHE:
+                self.cache = {"": self.cache[""]}
+            self.cache[terme] = resultat
+        self.dernier_terme = terme
+        return resultat
+
+    def _candidats(self, terme):
+        """Intersection des listes de trigrammes du terme, en partant de la plus courte."""
+        listes = sorted(
+            (self.ngrammes.get(terme[i:i + self.TAILLE_NGRAMME], [])
+             for i in range(len(terme) - self.TAILLE_NGRAMME + 1)),
+            key=len,
+        )
+        restants = set(listes[0])
+        for liste in listes[1:]:
+            if not restants:
+                break
+            restants.intersection_update(liste)
+        return sorted(restants)
@@ -6,46 +6,83 @@ import math
 from pathlib import Path
 
 from PyQt5.QtWidgets import (
-    QComboBox, QMessageBox, QMenu, QWidget, QApplication
+    QComboBox, QMessageBox, QMenu, QWidget, QApplication, QAbstractItemView,
+    QDialog, QDialogButtonBox, QLabel, QListWidget, QListWidgetItem, QVBoxLayout
 )
 from PyQt5.QtGui import QStandardItemModel, QStandardItem
 from PyQt5.QtCore import Qt, QSortFilterProxyModel
 
 from .ajout_personnage import AjoutPersonnageDialog
+from .index_noms import IndexNoms
+from .tri_global import ClesTri
+from .cache_totaux import CacheTotaux
+from ..optimisation.equipe import objectif_personnage, optimiser_equipe
+from ..optimisation.scores import METRIQUES, calculer_metriques
+from ..optimisation.stats import STATS, charger_bonus_effets, totaux_personnage
+from ..optimisation.vitesse import simuler_tours, vitesse_minimale
+from ..shell.gestion_shells import charger_shells
+from ..versionnage import Versionne
 
 class PersonnagesController:
-    def __init__(self, ui: QWidget, data_path: str, modules_path: str, shells_path: str):
+    def __init__(self, ui: QWidget, data_path: str, modules_path: str, shells_path: str,
+                 sauvegarde=None):
         self.ui            = ui
         self.data_path     = data_path
         self.modules_path  = modules_path
         self.shells_path   = shells_path
+        # Service SauvegardeAuto (facultatif) : écriture différée hors du thread de l'interface
+        self.sauvegarde    = sauvegarde
+        if sauvegarde is not None:
+            sauvegarde.enregistrer("personnages", data_path, self.instantane, preparer=list)
 
         # Modèle/proxy
         self.model = QStandardItemModel()
-        self.model.setHorizontalHeaderLabels([
+        headers = [
             "Nom","Niveau","PV","Attaque","Defense","Vitesse",
-            "Taux crit","Degats crit","Resistance","Precision"
-        ])
+            "Taux crit","Degats crit","Resistance","Precision",
+            *METRIQUES
+        ]
+        self.model.setHorizontalHeaderLabels(headers)
         self.proxy = QSortFilterProxyModel(self.ui)
         self.proxy.setSourceModel(self.model)
         self.proxy.setFilterKeyColumn(0)
         self.proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
         self.ui.characterTable.setModel(self.proxy)
-        self.ui.characterTable.setSortingEnabled(True)
-        self.ui.characterTable.sortByColumn(0, Qt.AscendingOrder)
+
+        # Tri global (tout le roster, avant pagination) : le proxy ne trie plus la page
+        self.cles_tri  = ClesTri(len(headers))
+        self.sortColumn, self.sortDescending = 0, False
+        self._cache_tri = (None, None)
+        header = self.ui.characterTable.horizontalHeader()
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(0, Qt.AscendingOrder)
+        header.sectionClicked.connect(self.on_sort_clicked)
 
         # Actions
         self.ui.addCharacterButton.clicked.connect(self.open_add_dialog)
-        self.ui.searchBar.textChanged.connect(self.proxy.setFilterFixedString)
+        self.ui.searchBar.textChanged.connect(self.on_search_changed)
         self.enable_context_menu()
 
+        # Roster publié par versions immuables (copie à l'écriture)
+        self.roster         = Versionne()
+
         # Pagination
-        self.all_characters = []
+        self.index_noms     = IndexNoms()
         self.currentPage    = 1
         self._setup_pagination()
 
-        # Charger modules.json
+        # Charger modules.json ; version_inventaire change à chaque modification de modules/shells
+        self.version_inventaire = 0
+        self._dialogue = None
         self._load_modules_data()
+        self._load_shells_data()
+        # Bonus des effets de shell {effet: {stat: valeur par exemplaire}}, lus une fois
+        self.bonus_effets = charger_bonus_effets(
+            os.path.join(os.path.dirname(data_path), "bonus_effets.json")
+        )
+        self.cache_totaux = CacheTotaux(self._totaux)
+        self._page_positions = []
 
         # Charger & afficher
         self.load_characters()
@@ -73,60 +110,146 @@ class PersonnagesController:
         else:
             QMessageBox.warning(self.ui, "Erreur", f"modules.json introuvable : {self.modules_path}")
             self.modules_data = []
+        self.modules_par_id = {m.get("id"): m for m in self.modules_data}
+        self.version_inventaire += 1
 
     def load_characters(self):
         if os.path.exists(self.data_path):
             try:
                 with open(self.data_path, "r", encoding="utf-8") as f:
-                    self.all_characters = json.load(f)
+                    self.roster.publier(json.load(f))
             except json.JSONDecodeError:
                 QMessageBox.warning(self.ui, "Erreur", "JSON personnages corrompu.")
-                self.all_characters = []
+                self.roster.publier([])
         else:
-            self.all_characters = []
+            self.roster.publier([])
+        self.reindexer()
+        self.cache_totaux.reconstruire(self.all_characters)
+        self.recalculer_cles_tri()
         self.currentPage = 1
 
+    def reindexer(self):
+        """Reconstruit l'index des noms (chargement, réaffectation de tout le roster)."""
+        self.index_noms.reconstruire(p["nom"] for p in self.all_characters)
+
+    def _filtre(self):
+        """Positions dans all_characters des personnages correspondant à la recherche (en cache)."""
+        return self.index_noms.rechercher(self.ui.searchBar.text())
+
+    def _lignes_cles(self, positions):
+        """Clés numériques (niveau, totaux, métriques) d'un lot de personnages, depuis le cache des totaux."""
+        totaux = [[self.cache_totaux[pos][k] for k in STATS] for pos in positions]
+        metriques = calculer_metriques(totaux) if totaux else {nom: [] for nom in METRIQUES}
+        return [
+            [self.all_characters[pos]["niveau"], *t, *(metriques[nom][i] for nom in METRIQUES)]
+            for i, (pos, t) in enumerate(zip(positions, totaux))
+        ]
+
+    def recalculer_cles_tri(self):
+        self.cles_tri.reconstruire(
+            [p["nom"] for p in self.all_characters], self._lignes_cles(range(len(self.all_characters)))
+        )
+
+    def _maj_cles_tri(self, positions):
+        """Met à jour les clés de tri des personnages modifiés (un seul : réinsertion incrémentale)."""
+        positions = sorted(positions)
+        if len(positions) == 1:
+            pos = positions[0]
+            self.cles_tri.mettre_a_jour(pos, self.all_characters[pos]["nom"], self._lignes_cles([pos])[0])
+        elif positions:
+            self.cles_tri.mettre_a_jour_lot(
+                positions, [self.all_characters[p]["nom"] for p in positions], self._lignes_cles(positions)
+            )
+
+    def _filtre_trie(self):
+        """Positions filtrées, ordonnées selon la colonne de tri (en cache jusqu'au prochain changement)."""
+        cle = (self.ui.searchBar.text().lower(), self.sortColumn, self.sortDescending, self.cles_tri.version)
+        if self._cache_tri[0] != cle:
+            ordre = self.cles_tri.ordonner(self._filtre(), self.sortColumn, self.sortDescending)
+            self._cache_tri = (cle, ordre)
+        return self._cache_tri[1]
+
+    def on_sort_clicked(self, column):
+        if column == self.sortColumn:
+            self.sortDescending = not self.sortDescending
+        else:
+            self.sortColumn, self.sortDescending = column, column != 0
+        self.ui.characterTable.horizontalHeader().setSortIndicator(
+            column, Qt.DescendingOrder if self.sortDescending else Qt.AscendingOrder
+        )
+        self.currentPage = 1
+        self.update_table()
+
+    @property
+    def all_characters(self) -> tuple:
+        """Version courante du roster ; toute modification publie une nouvelle version."""
+        return self.roster.elements
+
+    def instantane(self) -> tuple:
+        """Roster courant, lisible depuis un autre thread sans copie : les fiches publiées ne sont plus modifiées."""
+        return self.roster.elements
+
+    def references(self) -> list:
+        """[(personnage, totaux)] du roster courant, depuis le cache des totaux (classement des améliorations)."""
+        return [(p, self.cache_totaux[pos]) for pos, p in enumerate(self.all_characters)]
+
+    def _dialogue_personnage(self, data=None):
+        """
+        Dialogue d'ajout/modification réutilisé : créé une fois, puis remis à zéro
+        (ou rempli avec `data`) ; ses combos ne sont reconstruites que si
+        l'inventaire a changé depuis la dernière ouverture.
+        """
+        if self._dialogue is None:
+            self._dialogue = AjoutPersonnageDialog(QApplication.activeWindow())
+        dlg = self._dialogue
+        dlg.charger_inventaire(self.version_inventaire, self.modules_data, self.shells_par_id.values(),
+                               self.bonus_effets)
+        dlg.reinitialiser(data)
+        return dlg
+
+    def _fichiers_a_jour(self):
+        """Avant de relire un JSON sur disque, on vide les écritures en attente."""
+        if self.sauvegarde is not None:
+            self.sauvegarde.vider()
+
     def save_characters(self):
+        if self.sauvegarde is not None:
+            self.sauvegarde.marquer("personnages")
+            return
         os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
         with open(self.data_path, "w", encoding="utf-8") as f:
-            json.dump(self.all_characters, f, indent=2, ensure_ascii=False)
+            json.dump(list(self.all_characters), f, indent=2, ensure_ascii=False)
 
     def update_table(self):
         self.model.removeRows(0, self.model.rowCount())
-        term = self.ui.searchBar.text().lower()
-        filt = [p for p in self.all_characters if term in p["nom"].lower()]
+        filt = self._filtre_trie()
         pageSize = int(self.pageSizeCombo.currentText())
         pages = max(1, math.ceil(len(filt)/pageSize))
         self.currentPage = min(self.currentPage, pages)
         start = (self.currentPage-1)*pageSize
-        for p in filt[start:start+pageSize]:
-            self._append_row(p)
+        self._page_positions = filt[start:start+pageSize].tolist()
+        page = [self.all_characters[i] for i in self._page_positions]
+        # totaux en cache ; métriques de toute la page en un seul calcul vectorisé
+        aggs = [self.cache_totaux[i] for i in self._page_positions]
+        metriques = calculer_metriques([[a[k] for k in STATS] for a in aggs]) if aggs else {}
+        for i, (p, agg) in enumerate(zip(page, aggs)):
+            self._append_row(p, agg, {nom: v[i] for nom, v in metriques.items()})
         self.ui.pageLabel.setText(f"Page {self.currentPage} / {pages}")
         self.ui.prevPageButton.setEnabled(self.currentPage>1)
         self.ui.nextPageButton.setEnabled(self.currentPage<pages)
 
-    def _append_row(self, data):
-        # calc base+bonus + modules + %
-        def total_char(stat): return stat["base"]+stat["bonus"]
-        keys = ["PV","Attaque","Defense","Vitesse","Taux crit","Degats crit","Resistance","Precision"]
-        agg = {k: total_char(data[k]) for k in keys}
-        base = {k: data[k]["base"] for k in keys}
-
-        for mid in data.get("modules",[]):
-            m = next((m for m in self.modules_data if m.get("id")==mid),None)
-            if not m: continue
-            # stat principale flat
-            ms = m.get("stat_principale"); mv = m.get("valeur_principale",0)
-            if ms in agg: agg[ms]+=mv
-            # sous-stats
-            for sub in m.get("sous_stats",[]):
-                k = sub.get("stat"); v=sub.get("valeur",0)
-                if k in ("PV%","Attaque%","Defense%"):
-                    col = k.rstrip("%")
-                    agg[col]+= base[col]*(v/100)
-                elif k in agg:
-                    agg[k]+=v
+    def _totaux(self, data):
+        """Totaux base+bonus + modules + shell, mêmes règles que la recherche de build (totaux_personnage)."""
+        modules = [self.modules_par_id[mid] for mid in data.get("modules", []) if mid in self.modules_par_id]
+        return totaux_personnage(data, modules, self.shells_par_id.get(data.get("shell")), self.bonus_effets)
 
+    def _metriques(self, agg):
+        valeurs = calculer_metriques([[agg[k] for k in STATS]])
+        return {nom: v[0] for nom, v in valeurs.items()}
+
+    def _append_row(self, data, agg=None, metriques=None):
+        agg = agg or self._totaux(data)
+        metriques = metriques or self._metriques(agg)
         row = [
             QStandardItem(data["nom"]),
             QStandardItem(str(data["niveau"])),
@@ -139,28 +262,19 @@ class PersonnagesController:
             QStandardItem(str(int(agg["Resistance"]))),
             QStandardItem(str(int(agg["Precision"])))
         ]
+        for nom in METRIQUES:
+            # valeur numérique pour un tri correct par le proxy
+            it = QStandardItem()
+            it.setData(int(metriques[nom]), Qt.DisplayRole)
+            row.append(it)
         for it in row: it.setEditable(False)
         row[0].setData(data["nom"], Qt.UserRole)
         self.model.appendRow(row)
 
-    def _update_row(self, source_row, data):
+    def _update_row(self, source_row, data, agg=None):
         """Met à jour in-place la ligne source_row."""
-        # Refaire le même calcul que _append_row
-        def total_char(stat): return stat["base"]+stat["bonus"]
-        keys=["PV","Attaque","Defense","Vitesse","Taux crit","Degats crit","Resistance","Precision"]
-        agg={k: total_char(data[k]) for k in keys}
-        base={k:data[k]["base"] for k in keys}
-        for mid in data.get("modules",[]):
-            m=next((m for m in self.modules_data if m.get("id")==mid),None)
-            if not m: continue
-            ms, mv = m.get("stat_principale"), m.get("valeur_principale",0)
-            if ms in agg: agg[ms]+=mv
-            for sub in m.get("sous_stats",[]):
-                k,v=sub.get("stat"),sub.get("valeur",0)
-                if k in ("PV%","Attaque%","Defense%"):
-                    col=k.rstrip("%"); agg[col]+=base[col]*(v/100)
-                elif k in agg:
-                    agg[k]+=v
+        agg = agg or self._totaux(data)
+        metriques = self._metriques(agg)
         vals = [
             data["nom"], str(data["niveau"]),
             str(int(agg["PV"])), str(int(agg["Attaque"])),
@@ -170,6 +284,11 @@ class PersonnagesController:
         ]
         for col, v in enumerate(vals):
             self.model.item(source_row, col).setText(v)
+        for col, nom in enumerate(METRIQUES, start=len(vals)):
+            self.model.item(source_row, col).setData(int(metriques[nom]), Qt.DisplayRole)
+
+    def on_search_changed(self, text):
+        self.currentPage=1; self.update_table()
 
     def on_page_size_changed(self, text):
         self.currentPage=1; self.update_table()
@@ -179,62 +298,265 @@ class PersonnagesController:
             self.currentPage-=1; self.update_table()
 
     def next_page(self):
-        term=self.ui.searchBar.text().lower()
-        total=len([p for p in self.all_characters if term in p["nom"].lower()])
+        total=len(self._filtre())
         pages=max(1,math.ceil(total/int(self.pageSizeCombo.currentText())))
         if self.currentPage<pages:
             self.currentPage+=1; self.update_table()
 
     def open_add_dialog(self):
-        dlg=AjoutPersonnageDialog(QApplication.activeWindow(),
-                                  self.modules_path,self.shells_path)
-        dlg.modulesChanged.connect(lambda d, r=None:None)  # pas utile ici
+        dlg=self._dialogue_personnage()
         if dlg.exec_():
             new=dlg.get_data()
-            self.all_characters.append(new)
+            self.roster.publier(self.all_characters + (new,))
+            self.index_noms.mettre_a_jour(len(self.all_characters)-1, new["nom"])
+            self.cache_totaux.ajouter(new)
+            self.cles_tri.ajouter(new["nom"], self._lignes_cles([len(self.all_characters)-1])[0])
             self.save_characters()
-            self.currentPage=math.ceil(len(self.all_characters)/int(self.pageSizeCombo.currentText()))
+            # aller à la page où le tri place le nouveau personnage
+            ordre=self._filtre_trie().tolist(); pos=len(self.all_characters)-1
+            rang=ordre.index(pos) if pos in ordre else len(ordre)-1
+            self.currentPage=rang//int(self.pageSizeCombo.currentText())+1
             self.update_table()
 
     def edit_character(self, index):
         src = self.proxy.mapToSource(index)
         row = src.row()
-        term = self.ui.searchBar.text().lower()
-        filt = [p for p in self.all_characters if term in p["nom"].lower()]
-        idx = (self.currentPage-1)*int(self.pageSizeCombo.currentText())+row
-        if not (0 <= idx < len(filt)): return
-        actual = filt[idx]
+        pos = self._position(row)
+        if pos is None: return
+        actual = self.all_characters[pos]
 
-        dlg=AjoutPersonnageDialog(QApplication.activeWindow(),
-                                  self.modules_path,self.shells_path)
-        dlg.remplir_champs(actual)
-        # connexion live update
-        dlg.modulesChanged.connect(lambda data, r=row: self._update_row(r,data))
+        dlg=self._dialogue_personnage(actual)
+        # connexion live update (le dialogue est réutilisé : on déconnecte à la fermeture)
+        maj_ligne=lambda data, r=row: self._update_row(r,data)
+        dlg.modulesChanged.connect(maj_ligne)
+        try:
+            accepte=dlg.exec_()
+        finally:
+            dlg.modulesChanged.disconnect(maj_ligne)
 
-        if dlg.exec_():
-            updated=dlg.get_data()
-            for i,p in enumerate(self.all_characters):
-                if p["nom"]==actual["nom"]:
-                    self.all_characters[i]=updated; break
+        if accepte:
+            # les champs que le dialogue n'édite pas (priorite...) sont conservés
+            updated={**actual, **dlg.get_data()}
+            self.roster.remplacer({pos: updated})
+            self.index_noms.mettre_a_jour(pos, updated["nom"])
+            self.cache_totaux.mettre_a_jour(pos, actual, updated)
+            self._maj_cles_tri([pos])
             self.save_characters()
             self.update_table()
 
+    def _position(self, row):
+        """Position dans all_characters de la ligne `row` de la page courante."""
+        filt = self._filtre_trie()
+        idx = (self.currentPage-1)*int(self.pageSizeCombo.currentText())+row
+        return int(filt[idx]) if 0 <= idx < len(filt) else None
+
     def open_context_menu(self,pos):
         index=self.ui.characterTable.indexAt(pos)
         if not index.isValid(): return
         menu=QMenu(self.ui)
-        m=menu.addAction("Modifier"); d=menu.addAction("Supprimer")
+        rows=self._lignes_selectionnees()
+        if self.proxy.mapToSource(index).row() not in rows:
+            rows=[self.proxy.mapToSource(index).row()]
+        m=menu.addAction("Modifier"); m.setEnabled(len(rows)==1)
+        d=menu.addAction("Supprimer" if len(rows)==1 else f"Supprimer les {len(rows)} personnages")
+        u=menu.addAction("Déséquiper les modules")
+        t=menu.addAction("Ordre des tours…"); t.setEnabled(2<=len(rows)<=5)
+        menu.addSeparator()
+        o=menu.addAction("Optimiser l'équipe (tous les personnages)")
         act=menu.exec_(self.ui.characterTable.viewport().mapToGlobal(pos))
         if act==m: self.edit_character(index)
+        elif act==o: self.optimiser_equipe()
+        elif act==u: self.desequiper_personnages([self._position(r) for r in rows])
+        elif act==t: self.ordre_des_tours([self._position(r) for r in rows])
         elif act==d:
-            src=self.proxy.mapToSource(index); row=src.row()
-            nom=self.model.item(row,0).text()
+            positions=[p for p in (self._position(r) for r in rows) if p is not None]
+            if not positions: return
+            texte=f"'{self.all_characters[positions[0]]['nom']}'" if len(positions)==1 \
+                else f"les {len(positions)} personnages sélectionnés"
             if QMessageBox.question(self.ui,"Suppression",
-               f"Supprimer '{nom}' ?",QMessageBox.Yes|QMessageBox.No)==QMessageBox.Yes:
-                self.all_characters=[p for p in self.all_characters if p["nom"]!=nom]
-                self.save_characters(); self.update_table()
+               f"Supprimer {texte} ?",QMessageBox.Yes|QMessageBox.No)==QMessageBox.Yes:
+                self.supprimer_personnages(positions)
+
+    def _demander_ordre(self, noms):
+        """Liste réordonnable (glisser-déposer) des personnages ; retourne l'ordre voulu (indices) ou None."""
+        dlg=QDialog(self.ui); dlg.setWindowTitle("Ordre des tours")
+        layout=QVBoxLayout(dlg)
+        layout.addWidget(QLabel("Glisser les personnages dans l'ordre de jeu voulu :"))
+        liste=QListWidget(); liste.setDragDropMode(QAbstractItemView.InternalMove)
+        for i, nom in enumerate(noms):
+            item=QListWidgetItem(nom); item.setData(Qt.UserRole, i); liste.addItem(item)
+        layout.addWidget(liste)
+        boutons=QDialogButtonBox(QDialogButtonBox.Ok|QDialogButtonBox.Cancel)
+        boutons.accepted.connect(dlg.accept); boutons.rejected.connect(dlg.reject)
+        layout.addWidget(boutons)
+        if not dlg.exec_():
+            return None
+        return [liste.item(r).data(Qt.UserRole) for r in range(liste.count())]
+
+    def ordre_des_tours(self, positions, n_tours=12, ordre_cible=None):
+        """
+        Simule l'ordre des tours de l'équipe (Vitesse totales) et indique, pour que
+        l'équipe joue dans l'ordre voulu (demandé si `ordre_cible` est None),
+        la Vitesse minimale de chacun.
+        """
+        positions=[p for p in positions if p is not None]
+        noms=[self.all_characters[p]["nom"] for p in positions]
+        if ordre_cible is None:
+            ordre_cible=self._demander_ordre(noms)
+            if ordre_cible is None:
+                return
+        vitesses=[self.cache_totaux[p]["Vitesse"] for p in positions]
+        sequence=simuler_tours(vitesses, n_tours)[0]
+        minimums=vitesse_minimale(vitesses, ordre_cible)
+        lignes=[f"Tours : {' → '.join(noms[i] for i in sequence if i >= 0)}", "",
+                f"Ordre voulu : {' → '.join(noms[i] for i in ordre_cible)}",
+                "Vitesse minimale pour jouer dans cet ordre :"]
+        for nom, v, vmin in zip(noms, vitesses, minimums):
+            besoin="impossible (les autres restant fixes)" if vmin is None else str(vmin)
+            lignes.append(f"  {nom} : {int(v)} → {besoin}")
+        QMessageBox.information(self.ui, "Ordre des tours", "\n".join(lignes))
+
+    def _lignes_selectionnees(self):
+        sel=self.ui.characterTable.selectionModel()
+        return sorted({self.proxy.mapToSource(i).row() for i in sel.selectedRows()}) if sel else []
+
+    def supprimer_personnages(self, positions):
+        """Suppression groupée : une passe sur le roster, une écriture, une mise à jour de la page."""
+        retires=set(positions)
+        self.roster.retirer(retires)
+        self.index_noms.supprimer(retires)
+        self.cache_totaux.supprimer(retires, self.all_characters)
+        self.cles_tri.supprimer(retires)
+        self.save_characters(); self.update_table()
+
+    def desequiper_personnages(self, positions):
+        """Retire tous les modules des personnages donnés."""
+        positions=[p for p in positions if p is not None]
+        anciens={pos: self.all_characters[pos] for pos in positions}
+        self.roster.remplacer({pos: {**p, "modules": []} for pos, p in anciens.items()})
+        for pos, ancien in anciens.items():
+            self.cache_totaux.mettre_a_jour(pos, ancien, self.all_characters[pos])
+        self._maj_cles_tri(positions)
+        if positions:
+            self.save_characters(); self.update_table()
+
+    def on_modules_modifies(self, modules=(), supprimes=(), desequipes=()):
+        """
+        Appelé par l'onglet Modules après un ajout/modification/suppression :
+        seuls les personnages qui équipent ces modules sont recalculés, et leurs
+        lignes visibles mises à jour sur place. `desequipes` retire ces modules
+        de tous les personnages qui les portent (une seule écriture).
+        """
+        if desequipes:
+            self._desequiper_modules(set(desequipes))
+        for m in modules:
+            self.modules_par_id[m["id"]] = m
+        for mid in supprimes:
+            self.modules_par_id.pop(mid, None)
+        self.modules_data = list(self.modules_par_id.values())
+        self.version_inventaire += 1
+
+        ids = [m["id"] for m in modules] + list(supprimes)
+        touches = set(self.cache_totaux.invalider_modules(ids, self.all_characters))
+        self._maj_cles_tri(touches)
+        for row, pos in enumerate(self._page_positions):
+            if pos in touches:
+                self._update_row(row, self.all_characters[pos], self.cache_totaux[pos])
+
+    def _desequiper_modules(self, ids):
+        touches=set()
+        for mid in ids:
+            touches|=self.cache_totaux.porteurs_de(mid)
+        anciens={pos: self.all_characters[pos] for pos in sorted(touches)}
+        self.roster.remplacer({
+            pos: {**p, "modules": [m for m in p.get("modules",[]) if m not in ids]} for pos, p in anciens.items()
+        })
+        for pos, ancien in anciens.items():
+            self.cache_totaux.mettre_a_jour(pos, ancien, self.all_characters[pos])
+        self._maj_cles_tri(touches)
+        if touches:
+            self.save_characters()
+            for row, pos in enumerate(self._page_positions):
+                if pos in touches:
+                    self._update_row(row, self.all_characters[pos], self.cache_totaux[pos])
+
+    def personnages_utilisant(self, module_id):
+        """Personnages qui équipent ce module (index inverse, O(1))."""
+        return [self.all_characters[pos] for pos in sorted(self.cache_totaux.porteurs_de(module_id))]
+
+    def _load_shells_data(self):
+        """Shells au format structuré (ancien format migré à la lecture), indexés par id."""
+        self._fichiers_a_jour()
+        try:
+            shells = charger_shells(self.shells_path)
+        except json.JSONDecodeError:
+            QMessageBox.warning(self.ui, "Erreur", "shells.json est corrompu.")
+            shells = []
+        self.shells_par_id = {s["id"]: s for s in shells}
+        self.version_inventaire += 1
+        return shells
+
+    def on_shells_modifies(self, shells=()):
+        """Appelé par l'onglet Shells : recalcule les personnages qui portent ces shells."""
+        ids = set()
+        for s in shells:
+            self.shells_par_id[s["id"]] = s
+            ids.add(s["id"])
+        self.version_inventaire += 1
+        touches = [pos for pos, p in enumerate(self.all_characters) if p.get("shell") in ids]
+        for pos in touches:
+            p = self.all_characters[pos]
+            self.cache_totaux.mettre_a_jour(pos, p, p)
+        self._maj_cles_tri(touches)
+        for row, pos in enumerate(self._page_positions):
+            if pos in touches:
+                self._update_row(row, self.all_characters[pos], self.cache_totaux[pos])
+
+    def optimiser_equipe(self):
+        """Répartit l'inventaire sur tout le roster (ordre de la liste = priorité)."""
+        if not self.all_characters:
+            return
+        try:
+            objectifs = [objectif_personnage(p) for p in self.all_characters]
+        except ValueError as e:
+            QMessageBox.warning(self.ui, "Erreur", str(e))
+            return
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            resultats = optimiser_equipe(
+                self.all_characters, self.modules_data, list(self.shells_par_id.values()),
+                objectifs=objectifs,
+                poids=[p.get("priorite", 1) for p in self.all_characters],
+                bonus_effets=self.bonus_effets
+            )
+        finally:
+            QApplication.restoreOverrideCursor()
+
+        lignes = []
+        for r in resultats:
+            t = r["totaux"]
+            lignes.append(
+                f"{r['nom']} : PV {int(t['PV'])}, Attaque {int(t['Attaque'])}, "
+                f"Defense {int(t['Defense'])}, Vitesse {int(t['Vitesse'])}"
+            )
+        box = QMessageBox(QMessageBox.Question, "Optimisation d'équipe",
+                          "Appliquer la répartition proposée ?",
+                          QMessageBox.Yes | QMessageBox.No, self.ui)
+        box.setDetailedText("\n".join(lignes))
+        if box.exec_() != QMessageBox.Yes:
+            return
+        self.roster.publier(
+            {**p, "modules": [mid for mid in r["modules"] if mid], "shell": r["shell"]}
+            for p, r in zip(self.all_characters, resultats)
+        )
+        self.cache_totaux.reconstruire(self.all_characters)
+        self.recalculer_cles_tri()
+        self.save_characters()
+        self.update_table()
 
     def enable_context_menu(self):
         self.ui.characterTable.doubleClicked.connect(self.edit_character)
+        self.ui.characterTable.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.ui.characterTable.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.ui.characterTable.setContextMenuPolicy(Qt.CustomContextMenu)
         self.ui.characterTable.customContextMenuRequested.connect(self.open_context_menu)
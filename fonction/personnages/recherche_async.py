@@ -0,0 +1,77 @@
+import threading
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from ..optimisation.recherche_build import RechercheBuild
+
+
+class RechercheWorker(QThread):
+    """
+    Exécute une RechercheBuild lot par lot dans un thread séparé.
+
+    Après chaque lot : `progression(évalués, total, builds/s, secondes restantes)`,
+    et `resultats(top_k)` seulement si le top-K a changé. La recherche peut être
+    mise en pause ou annulée entre deux lots ; `termine(annulee)` est émis à la fin.
+    """
+
+    progression = pyqtSignal(object, object, float, float)
+    resultats = pyqtSignal(list)
+    termine = pyqtSignal(bool)
+    erreur = pyqtSignal(str)
+
+    def __init__(self, personnage, modules, shells=(), objectif=None, top_k=10,
+                 taille_lot=20_000, parent=None, **options):
+        super().__init__(parent)
+        self.personnage = personnage
+        self.modules = modules
+        self.shells = shells
+        self.objectif = objectif
+        self.top_k = top_k
+        self.taille_lot = taille_lot
+        self.options = options
+        self.meilleurs = []
+        self._annule = threading.Event()
+        self._reprise = threading.Event()
+        self._reprise.set()
+
+    def annuler(self):
+        self._annule.set()
+        self._reprise.set()
+
+    def mettre_en_pause(self, pause=True):
+        if pause:
+            self._reprise.clear()
+        else:
+            self._reprise.set()
+
+    @property
+    def en_pause(self) -> bool:
+        return not self._reprise.is_set()
+
+    def run(self):
+        try:
+            recherche = RechercheBuild(self.personnage, self.modules, self.shells,
+                                       self.objectif, **self.options)
+            total = recherche.total
+            actif, debut = 0.0, time.perf_counter()
+            for evalues, top in recherche.iterer(self.top_k, self.taille_lot):
+                actif += time.perf_counter() - debut
+                if self._cle(top) != self._cle(self.meilleurs):
+                    self.meilleurs = top
+                    self.resultats.emit(top)
+                debit = evalues / actif if actif > 0 else 0.0
+                restant = (total - evalues) / debit if debit > 0 else 0.0
+                self.progression.emit(evalues, total, debit, restant)
+                # la pause n'est pas comptée dans le débit
+                self._reprise.wait()
+                if self._annule.is_set():
+                    break
+                debut = time.perf_counter()
+        except Exception as e:
+            self.erreur.emit(f"{type(e).__name__}: {e}")
+        self.termine.emit(self._annule.is_set())
+
+    @staticmethod
+    def _cle(top):
+        return [(b["modules"], b["shell"], round(b["score"], 9)) for b in top]
@@ -0,0 +1,93 @@
+import numpy as np
+
+
+class ClesTri:
+    """
+    Clés de tri précalculées pour tout le roster, une colonne par colonne de la table.
+
+    La colonne 0 (nom) est textuelle, les autres numériques. Le rang de chaque
+    personnage dans une colonne est calculé une fois puis gardé en cache jusqu'à
+    la prochaine modification, si bien qu'une page triée se lit sans retrier.
+    """
+
+    def __init__(self, nb_colonnes):
+        self.nb_colonnes = nb_colonnes
+        self.noms = []
+        self.valeurs = np.empty((0, nb_colonnes - 1))
+        self._ordres = {}
+        self.version = 0
+
+    def __len__(self):
+        return len(self.noms)
+
+    def reconstruire(self, noms, lignes):
+        self.noms = [str(n).lower() for n in noms]
+        self.valeurs = np.asarray(lignes, dtype=float).reshape(len(self.noms), self.nb_colonnes - 1)
+        self._ordres.clear()
+        self.version += 1
+
+    def mettre_a_jour(self, pos, nom, ligne):
+        """
+        Remplace les clés d'un seul personnage et le replace dans chaque ordre
+        déjà calculé par recherche dichotomique, sans retrier la colonne.
+        """
+        self.noms[pos] = str(nom).lower()
+        self.valeurs[pos] = ligne
+        for colonne, (perm, _) in list(self._ordres.items()):
+            perm = perm[perm != pos]
+            cles = self._cles(colonne)
+            cible = np.searchsorted(cles[perm], cles[pos], side="right")
+            self._ordres[colonne] = self._avec_rangs(np.insert(perm, cible, pos))
+        self.version += 1
+
+    def mettre_a_jour_lot(self, positions, noms, lignes):
+        """Modification groupée : les ordres en cache sont simplement recalculés au prochain tri."""
+        for pos, nom in zip(positions, noms):
+            self.noms[pos] = str(nom).lower()
+        self.valeurs[list(positions)] = lignes
+        self._ordres.clear()
+        self.version += 1
+
+    def ajouter(self, nom, ligne):
+        self.noms.append(str(nom).lower())
+        self.valeurs = np.vstack([self.valeurs, np.asarray(ligne, dtype=float)[None, :]])
+        self._ordres.clear()
+        self.version += 1
+
+    def supprimer(self, positions):
+        positions = sorted(set(positions), reverse=True)
+        for pos in positions:
+            del self.noms[pos]
+        self.valeurs = np.delete(self.valeurs, positions, axis=0)
+        self._ordres.clear()
+        self.version += 1
+
+    def ordre(self, colonne):
+        """(permutation croissante, rang de chaque position) pour une colonne, en cache."""
+        if colonne not in self._ordres:
+            self._ordres[colonne] = self._avec_rangs(np.argsort(self._cles(colonne), kind="stable"))
+        return self._ordres[colonne]
+
+    def _cles(self, colonne):
+        if colonne == 0:
+            return np.array(self.noms, dtype=str)
+        return self.valeurs[:, colonne - 1]
+
+    @staticmethod
+    def _avec_rangs(perm):
+        rangs = np.empty_like(perm)
+        rangs[perm] = np.arange(len(perm))
+        return perm, rangs
+
+    def ordonner(self, positions, colonne, decroissant=False):
+        """
+        Trie une liste de positions (résultat d'un filtre) selon la colonne.
+        Sans filtre, la permutation en cache est renvoyée telle quelle (vue, pas de copie).
+        """
+        perm, rangs = self.ordre(colonne)
+        if len(positions) == len(perm):
+            ordonnees = perm
+        else:
+            positions = np.asarray(positions, dtype=np.intp)
+            ordonnees = positions[np.argsort(rangs[positions], kind="stable")]
+        return ordonnees[::-1] if decroissant else ordonnees
@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+import time
+
+from PyQt5.QtCore import QTimer
+
+
+class SauvegardeAuto:
+    """
+    Sauvegarde différée des fichiers JSON, hors du thread de l'interface.
+
+    Chaque magasin (personnages, modules, shells) s'enregistre avec une fonction
+    `instantane()` qui retourne une version figée de ses données, et au besoin
+    `preparer(instantane)` qui la convertit en JSON dans le thread d'écriture. `marquer(nom)`
+    ne fait que noter le magasin comme modifié : les modifications reçues dans
+    la fenêtre `delai_ms` sont regroupées, l'instantané est pris une seule fois
+    dans le thread de l'interface, puis sérialisé et écrit par un thread dédié.
+    Une nouvelle version d'un magasin remplace celle encore en attente d'écriture.
+    """
+
+    def __init__(self, delai_ms=500):
+        self.magasins = {}
+        self.sales = set()
+        self.en_attente = {}
+        self.latence_derniere = 0.0
+        self.latence_max = 0.0
+        self.ecritures = 0
+        self.erreurs = []
+
+        self._cond = threading.Condition()
+        self._ecriture_en_cours = False
+        self._arret = False
+        self._thread = threading.Thread(target=self._boucle, name="sauvegarde-auto", daemon=True)
+        self._thread.start()
+
+        self._timer = QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delai_ms)
+        self._timer.timeout.connect(self._publier)
+
+    def enregistrer(self, nom, chemin, instantane, indent=2, preparer=None):
+        self.magasins[nom] = (chemin, instantane, indent, preparer)
+
+    def marquer(self, nom):
+        """Note le magasin comme modifié ; l'écriture suivra à la fin de la fenêtre de regroupement."""
+        self.sales.add(nom)
+        self._timer.start()
+
+    @property
+    def profondeur_file(self) -> int:
+        """Magasins modifiés pas encore écrits (en fenêtre de regroupement ou en attente du thread)."""
+        with self._cond:
+            return len(self.sales | set(self.en_attente)) + (1 if self._ecriture_en_cours else 0)
+
+    def _publier(self):
+        """Thread de l'interface : prend les instantanés des magasins modifiés et les confie au thread."""
+        sales, self.sales = self.sales, set()
+        instantanes = {}
+        for nom in sales:
+            chemin, instantane, indent, preparer = self.magasins[nom]
+            instantanes[nom] = (chemin, instantane(), indent, preparer, time.perf_counter())
+        with self._cond:
+            self.en_attente.update(instantanes)
+            self._cond.notify()
+
+    def _boucle(self):
+        while True:
+            with self._cond:
+                while not self.en_attente and not self._arret:
+                    self._cond.wait()
+                if not self.en_attente and self._arret:
+                    return
+                lot, self.en_attente = self.en_attente, {}
+                self._ecriture_en_cours = True
+            for nom, (chemin, donnees, indent, preparer, debut) in lot.items():
+                try:
+                    if preparer is not None:
+                        donnees = preparer(donnees)
+                    self._ecrire(chemin, donnees, indent)
+                except Exception as e:
+                    self.erreurs.append((nom, f"{type(e).__name__}: {e}"))
+                    print(f"[ERREUR] Sauvegarde de {nom} impossible : {e}")
+                latence = time.perf_counter() - debut
+                self.latence_derniere = latence
+                self.latence_max = max(self.latence_max, latence)
+                self.ecritures += 1
+            with self._cond:
+                self._ecriture_en_cours = False
+                self._cond.notify_all()
+
+    @staticmethod
+    def _ecrire(chemin, donnees, indent):
+        """Écriture atomique : fichier temporaire puis remplacement."""
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        tmp = f"{chemin}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(donnees, f, indent=indent, ensure_ascii=False)
+        os.replace(tmp, chemin)
+
+    def vider(self):
+        """Écrit immédiatement tout ce qui est en attente et attend la fin des écritures."""
+        self._timer.stop()
+        if self.sales:
+            self._publier()
+        with self._cond:
+            while self.en_attente or self._ecriture_en_cours:
+                self._cond.wait()
+
+    def arreter(self):
+        """À la fermeture : vide la file puis termine le thread."""
+        self.vider()
+        with self._cond:
+            self._arret = True
+            self._cond.notify_all()
+        self._thread.join()
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import uuid
+
+SHELLS_FILE = "shells.json"
+
+
+def _parse_stat(texte):
+    """ "Attaque % 12.0" -> {"stat": "Attaque %", "valeur": 12.0} (ancien format) """
+    nom, _, valeur = str(texte).rpartition(" ")
+    try:
+        return {"stat": nom, "valeur": float(valeur)}
+    except ValueError:
+        return {"stat": str(texte), "valeur": 0.0}
+
+
+def _parse_effet(texte):
+    """ "fauche x3" -> ("fauche", 3) (ancien format) """
+    nom, _, mult = str(texte).rpartition(" ")
+    if mult.startswith("x") and mult[1:].isdigit():
+        return nom, int(mult[1:])
+    return str(texte), 1
+
+
+class Shell:
+    def __init__(self, icon, stats, effets, id=None):
+        self.id = id or self._generate_id()
+        self.icon = icon
+        self.stats = stats        # [{"stat": "Attaque %", "valeur": 12.0}, ...]
+        self.effets = effets      # {"fauche": 3, "eclairdivin": 2}
+
+    def _generate_id(self):
+        return f"SHL{uuid.uuid4().hex[:8].upper()}"
+
+    def libelle(self):
+        stats = ", ".join(f"{s['stat']} {s['valeur']:g}" for s in self.stats)
+        effets = ", ".join(f"{nom} x{n}" for nom, n in self.effets.items())
+        return f"{self.icon} — {stats}" + (f" — {effets}" if effets else "")
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "icon": self.icon,
+            "stats": self.stats,
+            "effets": self.effets,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Accepte aussi l'ancien format (stats "Nom valeur", effects "nom xN", sans id)."""
+        stats = [s if isinstance(s, dict) else _parse_stat(s) for s in data.get("stats", [])]
+        if "effets" in data:
+            effets = dict(data["effets"])
+        else:
+            effets = {}
+            for texte in data.get("effects", []):
+                nom, nombre = _parse_effet(texte)
+                effets[nom] = effets.get(nom, 0) + nombre
+        return cls(
+            icon=data.get("icon"),
+            stats=[{"stat": s["stat"], "valeur": float(s["valeur"])} for s in stats],
+            effets=effets,
+            id=data.get("id")
+        )
+
+
+def est_ancien_format(data) -> bool:
+    return "id" not in data or "effects" in data or any(not isinstance(s, dict) for s in data.get("stats", []))
+
+
+def migrer(data) -> list:
+    """
+    Convertit une liste lue dans shells.json en Shell. Les shells de l'ancien
+    format reçoivent un id déterministe (contenu + position) : une lecture avant
+    la réécriture du fichier migré voit déjà les mêmes ids.
+    """
+    shells = []
+    for i, d in enumerate(data):
+        if not d.get("id"):
+            h = hashlib.sha1(json.dumps([i, d], sort_keys=True, ensure_ascii=False).encode("utf-8"))
+            d = {**d, "id": f"SHL{h.hexdigest()[:8].upper()}"}
+        shells.append(Shell.from_dict(d))
+    return shells
+
+
+def charger_shells(filepath) -> list:
+    """Shells du fichier au format structuré (dicts), migrés en mémoire si besoin, sans réécrire le fichier."""
+    if not filepath or not os.path.exists(filepath):
+        return []
+    with open(filepath, "r", encoding="utf-8") as f:
+        return [s.to_dict() for s in migrer(json.load(f))]
+
+
+class ShellManager:
+    def __init__(self, filepath=SHELLS_FILE, sauvegarde=None):
+        self.filepath = filepath
+        self.sauvegarde = sauvegarde
+        if sauvegarde is not None:
+            sauvegarde.enregistrer("shells", filepath, self.instantane, indent=4)
+        self.shells = self.load()
+        self.reindexer()
+
+    def load(self):
+        if not os.path.exists(self.filepath):
+            return []
+        with open(self.filepath, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        shells = migrer(data)
+        # Migration de l'ancien format : les ids générés doivent être écrits une fois pour rester stables
+        if any(est_ancien_format(s) for s in data):
+            self.shells = shells
+            self.save()
+        return shells
+
+    def reindexer(self):
+        self.index_ids = {s.id: i for i, s in enumerate(self.shells)}
+
+    def get(self, shell_id):
+        i = self.index_ids.get(shell_id)
+        return None if i is None else self.shells[i]
+
+    def instantane(self):
+        return [{**s.to_dict(), "stats": [dict(st) for st in s.stats], "effets": dict(s.effets)} for s in self.shells]
+
+    def save(self):
+        if self.sauvegarde is not None:
+            self.sauvegarde.marquer("shells")
+            return
+        with open(self.filepath, "w", encoding="utf-8") as f:
+            json.dump([s.to_dict() for s in self.shells], f, indent=4, ensure_ascii=False)
+
+    def add_shell(self, shell):
+        self.shells.append(shell)
+        self.index_ids[shell.id] = len(self.shells) - 1
+        self.save()
+
+    def update_shell(self, index, new_shell):
+        self.shells[index] = new_shell
+        self.reindexer()
+        self.save()
+
+    def delete_shell(self, index):
+        if 0 <= index < len(self.shells):
+            del self.shells[index]
+            self.reindexer()
+            self.save()
@@ -2,14 +2,19 @@ import os
 import json
 from PyQt5 import QtWidgets, QtGui, QtCore
 
+from .gestion_shells import Shell, ShellManager
+
 class ShellController:
-    def __init__(self, ui, json_path, image_dir):
+    def __init__(self, ui, json_path, image_dir, sauvegarde=None):
         self.ui = ui
         self.json_path = json_path
+        self.sauvegarde = sauvegarde
+        # Abonnés notifiés après chaque ajout : callback(shells=[dicts])
+        self.abonnes_modifications = []
         self.image_dir = image_dir  # => "images/shell"
         self.shells_dir = image_dir
         self.effects_dir = os.path.join(self.image_dir, "effets")
-        self.shells = []
+        self.manager = None
         self.selected_icon = None
         self.effect_counts = {"x2": None, "x3": []}
         self.effect_widgets = []
@@ -51,8 +56,8 @@ class ShellController:
         if not os.path.exists(self.json_path):
             with open(self.json_path, "w", encoding="utf-8") as f:
                 json.dump([], f, indent=4)
-        with open(self.json_path, "r", encoding="utf-8") as f:
-            self.shells = json.load(f)
+        # Le ShellManager migre au passage l'ancien format (stats/effets en texte, sans id)
+        self.manager = ShellManager(self.json_path, self.sauvegarde)
 
     def _highlight_button(self, button, selected):
         if selected:
@@ -150,10 +155,13 @@ class ShellController:
 
     def _load_shells_created(self):
         self.ui.listWidgetShellsCreated.clear()
-        for shell in self.shells:
-            icon_path = os.path.join(self.shells_dir, f"{shell['icon']}.png")
-            label = f"{shell['icon']}\nStats: {', '.join(shell['stats'])}\nEffets: {', '.join(shell['effects'])}"
+        for shell in self.manager.shells:
+            icon_path = os.path.join(self.shells_dir, f"{shell.icon}.png")
+            stats = ", ".join(f"{st['stat']} {st['valeur']:g}" for st in shell.stats)
+            effets = ", ".join(f"{nom} x{n}" for nom, n in shell.effets.items())
+            label = f"{shell.icon}\nStats: {stats}\nEffets: {effets}"
             item = QtWidgets.QListWidgetItem(QtGui.QIcon(icon_path), label)
+            item.setData(QtCore.Qt.UserRole, shell.id)
             self.ui.listWidgetShellsCreated.addItem(item)
 
     def save_shell(self):
@@ -161,22 +169,22 @@ class ShellController:
             QtWidgets.QMessageBox.warning(self.ui, "Erreur", "Aucune icône de shell sélectionnée.")
             return
 
-        shell = {
-            "icon": self.selected_icon,
-            "stats": [
-                f"{self.ui.comboStat1.currentText()} {self.ui.valueStat1.value()}",
-                f"{self.ui.comboStat2.currentText()} {self.ui.valueStat2.value()}",
-                f"{self.ui.comboStat3.currentText()} {self.ui.valueStat3.value()}"
-            ],
-            "effects": [f"{e} x3" for e in self.effect_counts["x3"]]
-        }
-
+        effets = {e: 3 for e in self.effect_counts["x3"]}
         if self.effect_counts["x2"]:
-            shell["effects"].append(f"{self.effect_counts['x2']} x2")
+            effets[self.effect_counts["x2"]] = 2
+        shell = Shell(
+            icon=self.selected_icon,
+            stats=[
+                {"stat": self.ui.comboStat1.currentText(), "valeur": self.ui.valueStat1.value()},
+                {"stat": self.ui.comboStat2.currentText(), "valeur": self.ui.valueStat2.value()},
+                {"stat": self.ui.comboStat3.currentText(), "valeur": self.ui.valueStat3.value()},
+            ],
+            effets=effets
+        )
 
-        self.shells.append(shell)
-        with open(self.json_path, "w", encoding="utf-8") as f:
-            json.dump(self.shells, f, indent=4, ensure_ascii=False)
+        self.manager.add_shell(shell)
+        for callback in self.abonnes_modifications:
+            callback(shells=[shell.to_dict()])
 
         self._load_shells_created()
         QtWidgets.QMessageBox.information(self.ui, "Succès", "Shell enregistré avec succès.")
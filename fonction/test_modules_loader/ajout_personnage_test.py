@@ -1,7 +1,9 @@
+import json
 import sys
 from pathlib import Path
 from PyQt5.QtWidgets import QApplication
 from v4.fonction.personnages.ajout_personnage import AjoutPersonnageDialog
+from v4.fonction.shell.gestion_shells import charger_shells
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -11,8 +13,17 @@ if __name__ == "__main__":
     modules_path = base_path / "data" / "modules.json"
     shells_path = base_path / "data" / "shells.json"
 
+    # Inventaire lu ici puis confié au dialogue, comme le fait PersonnagesController
+    modules = []
+    if modules_path.exists():
+        with open(modules_path, encoding="utf-8") as f:
+            modules = json.load(f)
+    shells = charger_shells(str(shells_path))
+
     # Crée et affiche la fenêtre d’ajout
-    dialog = AjoutPersonnageDialog(None, str(modules_path), str(shells_path))
+    dialog = AjoutPersonnageDialog(None)
+    dialog.charger_inventaire(1, modules, shells)
+    dialog.reinitialiser()
     if dialog.exec_():
         data = dialog.get_data()
         print("\n=== Données récupérées ===")
@@ -0,0 +1,42 @@
+class Versionne:
+    """
+    Collection immuable versionnée (copie à l'écriture).
+
+    Les éléments sont publiés sous forme de tuple : une modification construit
+    un nouveau tuple et l'installe en une seule affectation, avec un numéro de
+    version incrémenté. Un thread de travail (recherche, sauvegarde, recalcul)
+    garde l'instantané qu'il a lu, cohérent même si l'interface publie entre-temps.
+    Les éléments eux-mêmes ne doivent plus être modifiés une fois publiés :
+    on publie un nouvel élément à la place.
+    """
+
+    def __init__(self, elements=()):
+        self._etat = (0, tuple(elements))
+
+    @property
+    def version(self) -> int:
+        return self._etat[0]
+
+    @property
+    def elements(self) -> tuple:
+        return self._etat[1]
+
+    def instantane(self):
+        """(version, éléments) lus ensemble, sans copie."""
+        return self._etat
+
+    def publier(self, elements) -> tuple:
+        version, _ = self._etat
+        self._etat = (version + 1, tuple(elements))
+        return self._etat[1]
+
+    def remplacer(self, remplacements: dict) -> tuple:
+        """Publie une version où les positions {index: élément} sont remplacées."""
+        elements = list(self._etat[1])
+        for index, element in remplacements.items():
+            elements[index] = element
+        return self.publier(elements)
+
+    def retirer(self, indices) -> tuple:
+        retires = set(indices)
+        return self.publier(e for i, e in enumerate(self._etat[1]) if i not in retires)
@@ -10,6 +10,7 @@ from PyQt5.QtWidgets import QApplication, QWidget
 from fonction.personnages.personnages_controller import PersonnagesController
 from fonction.modules.modules_controller import ModulesController
 from fonction.shell.shell_controller import ShellController  # ✅ Shells
+from fonction.sauvegarde_auto import SauvegardeAuto
 
 class MainWindow(QWidget):
     def __init__(self):
@@ -30,6 +31,9 @@ class MainWindow(QWidget):
         modules_json = os.path.join(base_dir, "data", "modules.json")
         shells_json = os.path.join(base_dir, "data", "shells.json")
 
+        # === Sauvegarde différée (regroupe les modifications, écrit hors du thread de l'UI)
+        self.sauvegarde = SauvegardeAuto()
+
         # === Onglet Personnages
         tab_characters_ui = os.path.join(base_dir, "ui", "tab_characters.ui")
         tab_characters = uic.loadUi(tab_characters_ui)
@@ -38,21 +42,32 @@ class MainWindow(QWidget):
             tab_characters,
             personnages_json,
             modules_json,
-            shells_json
+            shells_json,
+            self.sauvegarde
         )
 
         # === Onglet Modules
         module_tab_ui = os.path.join(base_dir, "ui", "module_tab.ui")
         self.tabModules = uic.loadUi(module_tab_ui)
         self.mainStack.insertWidget(1, self.tabModules)
-        self.modules_controller = ModulesController(self.tabModules, modules_json)
+        self.modules_controller = ModulesController(
+            self.tabModules, modules_json, self.sauvegarde,
+            references=self.personnages_controller.references
+        )
+        # Les totaux des personnages suivent les modifications de modules
+        self.modules_controller.abonnes_modifications.append(
+            self.personnages_controller.on_modules_modifies
+        )
 
         # === Onglet Shells
         shell_tab_ui = os.path.join(base_dir, "ui", "shell_tab.ui")
         tab_shell = uic.loadUi(shell_tab_ui)
         self.mainStack.insertWidget(2, tab_shell)
         shells_images = os.path.join(base_dir, "images", "shell")
-        self.shell_controller = ShellController(tab_shell, shells_json, shells_images)
+        self.shell_controller = ShellController(tab_shell, shells_json, shells_images, self.sauvegarde)
+        self.shell_controller.abonnes_modifications.append(
+            self.personnages_controller.on_shells_modifies
+        )
 
         # === Mise à jour de la sidebar
         self.sidebar.addItem("Shells")
@@ -60,5 +75,7 @@ class MainWindow(QWidget):
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = MainWindow()
+    app.aboutToQuit.connect(window.modules_controller.attendre_simulation)
+    app.aboutToQuit.connect(window.sauvegarde.arreter)
     window.show()
     sys.exit(app.exec_())